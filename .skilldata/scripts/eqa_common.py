@@ -7,56 +7,89 @@ debug logging, and config file loading.
 
 import functools
 import json
-import logging
-import logging.handlers
 import os
 import re
 import shutil
 import subprocess
 import sys
+import tempfile
+import time
 import traceback
 from pathlib import Path
 
+# orjson is optional: much faster encoding of multi-MB command output
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # ---------------------------------------------------------------------------
 # Secret redaction
 # ---------------------------------------------------------------------------
 
 _secrets: set = set()
 _secret_re: re.Pattern | None = None
+_secret_re_dirty = False
 
 
 def register_secrets(*values):
     """Register strings to be redacted from all JSON output."""
-    global _secret_re
-    changed = False
+    global _secret_re_dirty
     for v in values:
         if v and isinstance(v, str) and len(v) >= 4:
             if v not in _secrets:
                 _secrets.add(v)
-                changed = True
-    if changed:
-        # Recompile once per batch of new secrets.  Longest-first so
-        # "Student@123" is matched before "Student".
-        ordered = sorted(_secrets, key=len, reverse=True)
-        _secret_re = re.compile('|'.join(re.escape(s) for s in ordered))
+                _secret_re_dirty = True
+
+
+def _rebuild_secret_re():
+    """Compile the redaction pattern from the registered secrets."""
+    global _secret_re, _secret_re_dirty
+    # Longest-first so "Student@123" is matched before "Student".
+    ordered = sorted(_secrets, key=len, reverse=True)
+    _secret_re = re.compile('|'.join(re.escape(s) for s in ordered))
+    _secret_re_dirty = False
 
 
 def _redact(text: str) -> str:
     """Replace registered secrets in a string with '***'."""
+    if _secret_re_dirty:
+        # Compiled lazily so repeated register_secrets() calls cost
+        # one sort + compile rather than one per call.
+        _rebuild_secret_re()
     if _secret_re is None:
         return text
     return _secret_re.sub('***', text)
 
 
 def _redact_data(obj):
-    """Recursively redact secrets in dicts, lists, and strings."""
+    """Redact secrets in dicts, lists, and strings.
+
+    Walks nested containers with an explicit stack, copying each one so
+    the caller's data is left untouched.  Returns obj unchanged when no
+    secrets are registered.
+    """
+    if not _secrets:
+        return obj
     if isinstance(obj, str):
         return _redact(obj)
-    if isinstance(obj, dict):
-        return {k: _redact_data(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_redact_data(v) for v in obj]
-    return obj
+    if not isinstance(obj, (dict, list)):
+        return obj
+
+    root = dict(obj) if isinstance(obj, dict) else list(obj)
+    stack = [root]
+    while stack:
+        cur = stack.pop()
+        for k, v in (cur.items() if isinstance(cur, dict) else enumerate(cur)):
+            if isinstance(v, str):
+                cur[k] = _redact(v)
+            elif isinstance(v, dict):
+                cur[k] = v = dict(v)
+                stack.append(v)
+            elif isinstance(v, list):
+                cur[k] = v = list(v)
+                stack.append(v)
+    return root
 
 
 def _output(data):
@@ -66,8 +99,19 @@ def _output(data):
     the stdout_guard context manager, ensuring clean JSON output even
     if third-party libraries have written to sys.stdout.
     """
-    line = json.dumps(_redact_data(data), default=str) + "\n"
-    os.write(1, line.encode())
+    data = _redact_data(data)
+    if orjson is not None:
+        try:
+            os.write(1, orjson.dumps(
+                data, default=str,
+                option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS,
+            ))
+            return
+        except TypeError:
+            pass  # e.g. ints beyond 64 bits; let the stdlib handle it
+    # Same compact, unescaped UTF-8 form orjson produces
+    line = json.dumps(data, default=str, ensure_ascii=False, separators=(',', ':')) + "\n"
+    os.write(1, line.encode(errors='replace'))
 
 
 class stdout_guard:
@@ -104,15 +148,21 @@ def _err(msg):
 # Debug log  (~/.cache/eqa/debug.log, rotating, 2 MB × 3 backups)
 # ---------------------------------------------------------------------------
 
-_debug_logger: logging.Logger | None = None
+# logging is imported on first use: most tool runs never log, and the
+# logging package is a sizeable share of interpreter startup
+_debug_logger = None
+_DEBUG = 10  # logging.DEBUG
 
 
-def _get_debug_logger() -> logging.Logger:
+def _get_debug_logger() -> "logging.Logger":
     """Lazily initialise and return the rotating debug logger."""
     global _debug_logger
     if _debug_logger is not None:
         return _debug_logger
 
+    import logging
+    import logging.handlers
+
     cache_dir = get_cache_dir()
     log_path = os.path.join(cache_dir, "debug.log")
 
@@ -134,7 +184,7 @@ def _get_debug_logger() -> logging.Logger:
     return logger
 
 
-def debug_log(msg: str, *, level: int = logging.DEBUG, caller: str = ""):
+def debug_log(msg: str, *, level: int = _DEBUG, caller: str = ""):
     """Append a redacted message to the rotating debug log.
 
     Parameters
@@ -164,22 +214,71 @@ def get_state_path(tool_name):
     return os.path.join(get_cache_dir(), f"{tool_name}-state.json")
 
 
+# path -> (stat key, bytes, parsed dict or None) last read or written by
+# this process.  load_state returns the cached parse while the file is
+# unchanged, and save_state skips rewriting identical content.
+_state_seen: dict = {}
+
+
+def _file_key(path):
+    """Return (mtime_ns, size) identifying path's current content, or None."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
 def load_state(path):
-    """Load JSON state from file. Returns {} on missing/corrupt file."""
-    if os.path.exists(path):
-        try:
-            with open(path) as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            pass
-    return {}
+    """Load JSON state from file. Returns {} on missing/corrupt file.
+
+    Repeated loads of an unchanged file reuse the previous parse.  The
+    caller gets its own top-level dict, so assigning keys is safe, but
+    nested values are shared and must not be mutated in place.
+    """
+    key = _file_key(path)
+    if key is None:
+        return {}
+    seen = _state_seen.get(path)
+    if seen and seen[0] == key and seen[2] is not None:
+        return dict(seen[2])
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError, IOError):
+        return {}
+    if isinstance(data, dict):
+        _state_seen[path] = (key, raw, data)
+        return dict(data)
+    return data
 
 
 def save_state(path, data):
-    """Save JSON state to file, creating cache dir if needed."""
+    """Save JSON state to file atomically, creating cache dir if needed.
+
+    The payload is written to a temp file in the same directory and
+    renamed over path, so a crash never leaves a truncated state file.
+    Nothing is written when the file still holds exactly this content.
+    """
+    payload = json.dumps(data).encode()
+    seen = _state_seen.get(path)
+    if seen and seen[1] == payload and seen[0] == _file_key(path):
+        return
+
     get_cache_dir()  # ensure directory exists
-    with open(path, 'w') as f:
-        json.dump(data, f)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    _state_seen[path] = (_file_key(path), payload, None)
 
 
 def find_epub(directory):
@@ -193,6 +292,53 @@ def find_epub(directory):
     return None
 
 
+# How long a verified ssh-agent (keyed on SSH_AUTH_SOCK) is trusted
+# before ssh-add is consulted again.
+_AGENT_CHECK_TTL = 3600
+
+_agent_verified = False
+
+
+def _ensure_agent_key():
+    """Make sure ssh-agent holds a key, skipping ssh-add when recently verified.
+
+    The result is remembered for the process lifetime and in
+    ~/.cache/eqa/ssh-agent-state.json, keyed on SSH_AUTH_SOCK, so later
+    invocations against the same agent avoid the ssh-add fork.
+    """
+    global _agent_verified
+    if _agent_verified:
+        return
+
+    sock = os.environ.get("SSH_AUTH_SOCK", "")
+    state_path = get_state_path("ssh-agent")
+    state = load_state(state_path)
+    if (sock and state.get("auth_sock") == sock
+            and time.time() - state.get("verified_at", 0) < _AGENT_CHECK_TTL):
+        _agent_verified = True
+        return
+
+    try:
+        result = subprocess.run(
+            ["ssh-add", "-l"], capture_output=True, text=True, timeout=5,
+        )
+        if result.returncode != 0:
+            for key in [Path.home() / ".ssh" / "id_ed25519",
+                        Path.home() / ".ssh" / "id_rsa"]:
+                if key.exists():
+                    result = subprocess.run(
+                        ["ssh-add", str(key)],
+                        capture_output=True, text=True, timeout=10,
+                    )
+                    break
+        if result.returncode == 0:
+            _agent_verified = True
+            if sock:
+                save_state(state_path, {"auth_sock": sock, "verified_at": time.time()})
+    except Exception:
+        pass
+
+
 def build_epub(directory: Path) -> tuple[Path | None, str | None]:
     """Build EPUB using sk. Returns (epub_path, error_message).
 
@@ -214,21 +360,7 @@ def build_epub(directory: Path) -> tuple[Path | None, str | None]:
         return None, "Not a scaffolding course (no outline.yml)"
 
     # Ensure ssh-agent has a key loaded (sk needs it for submodule access)
-    try:
-        result = subprocess.run(
-            ["ssh-add", "-l"], capture_output=True, text=True, timeout=5,
-        )
-        if result.returncode != 0:
-            for key in [Path.home() / ".ssh" / "id_ed25519",
-                        Path.home() / ".ssh" / "id_rsa"]:
-                if key.exists():
-                    subprocess.run(
-                        ["ssh-add", str(key)],
-                        capture_output=True, text=True, timeout=10,
-                    )
-                    break
-    except Exception:
-        pass
+    _ensure_agent_key()
 
     _err(f"Building EPUB for {directory.name}...")
     try:
@@ -14,14 +14,24 @@ from pathlib import Path
 from eqa_common import _output, _err, json_safe
 
 
-NAVIGATOR_PATTERNS = [
+# The corpus is scanned as-is rather than lowercased; every pattern folds
+# case in the regex engine instead of materializing a second full copy.
+_I = re.IGNORECASE
+
+
+def _compile_all(patterns):
+    """Compile a list of pattern strings case-insensitively."""
+    return [re.compile(p, _I) for p in patterns]
+
+
+NAVIGATOR_PATTERNS = _compile_all([
     r'ansible-navigator',
     r'navigator\s+run',
     r'-m\s+stdout',
     r'ansible-navigator\.ya?ml',
-]
+])
 
-DEV_TOOLS_PATTERNS = [
+DEV_TOOLS_PATTERNS = _compile_all([
     r'ansible\s+development\s+tools',
     r'ansible-dev-tools',
     r'ansible-devtools',
@@ -29,34 +39,32 @@ DEV_TOOLS_PATTERNS = [
     r'vscode.*ansible',
     r'ansible\s+extension',
     r'devcontainer',
-]
+])
 
-AAP_PATTERNS = [
+AAP_PATTERNS = _compile_all([
     r'automation\s+controller',
     r'ansible\s+controller',
     r'ansible\s+tower',
-    r'AAP\s+controller',
     r'controller\.example\.com',
-]
+])
 
-CONTAINER_PATTERNS = [
+CONTAINER_PATTERNS = _compile_all([
     r'\bpodman\b',
     r'\bdocker\b',
     r'container\s+image',
     r'execution\s+environment',
-    r'\bEE\b',
     r'ee-supported',
     r'ee-minimal',
-]
+])
 
-OPENSHIFT_PATTERNS = [
+OPENSHIFT_PATTERNS = _compile_all([
     r'\boc\s+',
     r'openshift',
     r'kubernetes',
     r'\bkubectl\b',
-]
+])
 
-INTENTIONAL_ERROR_PATTERNS = [
+INTENTIONAL_ERROR_PATTERNS = _compile_all([
     r'intentional(?:ly)?\s+(?:broken|incorrect|wrong|error)',
     r'deliberate(?:ly)?\s+(?:broken|incorrect|wrong|error)',
     r'fix\s+the\s+(?:broken|incorrect|error)',
@@ -66,30 +74,51 @@ INTENTIONAL_ERROR_PATTERNS = [
     r'debug(?:ging)?\s+the',
     r'what\s+is\s+wrong',
     r'correct\s+the\s+(?:error|mistake|problem)',
-]
+])
 
-VM_SSH_KEY_PATTERNS = [
+VM_SSH_KEY_PATTERNS = _compile_all([
     r'ssh_authorized_keys',
-    r'ssh-rsa\s+AAAA',
     r'authorized_keys',
     r'identity.*file',
     r'virtctl\s+ssh\b',
-]
+])
 
-VM_PASSWORD_PATTERNS = [
+VM_PASSWORD_PATTERNS = _compile_all([
     r'log\s*in\s+as\s+(?:the\s+)?root\s+user\s+with\s+\w+\s+as\s+the\s+password',
     r'password.*redhat',
     r'chpasswd',
     r'passwd\s+--stdin',
     r'console\s+tab.*log\s*in',
-]
+])
 
 STANDARD_HOSTS = {
     'servera', 'serverb', 'serverc', 'serverd', 'servere',
     'workstation', 'bastion', 'utility',
 }
 
-TOOL_PATTERNS = {
+_HOST_RE = re.compile(r'\b(' + '|'.join(map(re.escape, sorted(STANDARD_HOSTS))) + r')\b', _I)
+
+# Dotted tokens that look like namespace.collection but are really hostnames
+# or abbreviations.  One anchored alternation so each candidate costs a single
+# regex call instead of a Python-level loop over patterns and prefixes.
+_COLLECTION_EXCLUDE = re.compile(
+    r'^(?:'
+    r'ansible\.builtin'
+    r'|server[a-e]\.lab'
+    r'|[a-z]+\.lab'          # *.lab.example.com hostnames
+    r'|[a-z]+\.example'      # *.example.com hostnames
+    r'|console\.redhat'      # console.redhat.com
+    r'|docs\.ansible'        # docs.ansible.com
+    r'|galaxy\.ansible'      # galaxy.ansible.com
+    r'|www\..*'
+    r'|e\.g\..*'
+    r'|i\.e\..*'
+    r')$'
+)
+
+_COLLECTION_RE = re.compile(r'\b([a-z_]+\.[a-z_]+)\.[a-z_]+\b', _I)
+
+TOOL_PATTERNS = {tool: re.compile(p, _I) for tool, p in {
     'lab': r'\blab\s+(?:start|finish|grade)',
     'ansible-navigator': r'ansible-navigator',
     'ansible-playbook': r'ansible-playbook',
@@ -106,11 +135,26 @@ TOOL_PATTERNS = {
     'ansible-builder': r'ansible-builder',
     'molecule': r'\bmolecule\b',
     'ansible-dev-tools': r'ansible.*dev.*tools',
-}
+}.items()}
 
 
-def _read_all_content(epub_dir: Path) -> str:
-    """Read all text from extracted EPUB HTML files."""
+def _html_text_extractor():
+    """Return a callable mapping HTML markup to its visible text.
+
+    Prefers selectolax (C HTML parser, much faster on large EPUBs) and
+    falls back to BeautifulSoup when it is not installed.
+    """
+    try:
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        pass
+    else:
+        def extract(content: str) -> str:
+            tree = HTMLParser(content)
+            node = tree.body or tree.root
+            return node.text(separator=' ', strip=True) if node else ''
+        return extract
+
     try:
         from bs4 import BeautifulSoup
     except ImportError:
@@ -118,13 +162,21 @@ def _read_all_content(epub_dir: Path) -> str:
             "beautifulsoup4 is not installed. Run: pip install beautifulsoup4 lxml"
         )
 
+    def extract(content: str) -> str:
+        soup = BeautifulSoup(content, 'html.parser')
+        return soup.get_text(separator=' ', strip=True)
+    return extract
+
+
+def _read_all_content(epub_dir: Path) -> str:
+    """Read all text from extracted EPUB HTML files."""
+    extract = _html_text_extractor()
+
     all_text = []
     for html_file in sorted(list(epub_dir.rglob("*.xhtml")) + list(epub_dir.rglob("*.html"))):
         try:
             content = html_file.read_text(encoding='utf-8', errors='ignore')
-            soup = BeautifulSoup(content, 'html.parser')
-            text = soup.get_text(separator=' ', strip=True)
-            all_text.append(text)
+            all_text.append(extract(content))
         except Exception:
             continue
     return '\n'.join(all_text)
@@ -153,46 +205,45 @@ def cmd_build(args):
         _output({"success": False, "error": "No XHTML/HTML content found. Pass the EPUB extract directory (extract_dir from epub_tool.py parse), not the course repo."})
         return
 
-    text_lower = text.lower()
     profile = {"success": True}
 
     # Dev environment
-    devcontainer_indicators = [
+    devcontainer_indicators = _compile_all([
         r'\.devcontainer', r'devcontainer\.json', r'development\s+container',
         r'dev\s+container', r'open.*folder.*inside.*dev', r'reopen.*in.*container',
-    ]
-    devcontainer_count = sum(1 for p in devcontainer_indicators if re.search(p, text_lower))
+    ])
+    devcontainer_count = sum(1 for p in devcontainer_indicators if p.search(text))
     profile["uses_dev_containers"] = devcontainer_count >= 2
 
     if profile["uses_dev_containers"]:
         image_match = re.search(r'(registry\.redhat\.io/[^\s"]+|quay\.io/[^\s"]+)', text)
         profile["dev_container_image"] = image_match.group(1) if image_match else None
 
-    vscode_indicators = [
+    vscode_indicators = _compile_all([
         r'visual\s+studio\s+code', r'\bvs\s+code\b', r'\bvscode\b',
         r'explorer\s+icon.*activity\s+bar', r'click.*file.*›.*new.*text.*file',
-    ]
-    vscode_count = sum(1 for p in vscode_indicators if re.search(p, text_lower))
+    ])
+    vscode_count = sum(1 for p in vscode_indicators if p.search(text))
     profile["uses_vscode"] = vscode_count >= 2
 
     # Tech stack
-    nav_count = sum(1 for p in NAVIGATOR_PATTERNS if re.search(p, text_lower))
+    nav_count = sum(1 for p in NAVIGATOR_PATTERNS if p.search(text))
     profile["uses_ansible_navigator"] = nav_count >= 2
 
-    dev_count = sum(1 for p in DEV_TOOLS_PATTERNS if re.search(p, text_lower))
+    dev_count = sum(1 for p in DEV_TOOLS_PATTERNS if p.search(text))
     profile["uses_ansible_dev_tools"] = dev_count >= 1
 
-    playbook_refs = len(re.findall(r'ansible-playbook\b', text_lower))
+    playbook_refs = len(re.findall(r'ansible-playbook\b', text, _I))
     profile["uses_ansible_playbook"] = playbook_refs > 3 and not profile["uses_ansible_navigator"]
 
-    aap_count = sum(1 for p in AAP_PATTERNS if re.search(p, text_lower))
+    aap_count = sum(1 for p in AAP_PATTERNS if p.search(text))
     profile["uses_aap_controller"] = aap_count >= 2
 
-    container_count = sum(1 for p in CONTAINER_PATTERNS if re.search(p, text_lower))
+    container_count = sum(1 for p in CONTAINER_PATTERNS if p.search(text))
     profile["uses_containers"] = container_count >= 2
-    profile["uses_execution_environments"] = bool(re.search(r'execution.environment', text_lower))
+    profile["uses_execution_environments"] = bool(re.search(r'execution.environment', text, _I))
 
-    oc_count = sum(1 for p in OPENSHIFT_PATTERNS if re.search(p, text_lower))
+    oc_count = sum(1 for p in OPENSHIFT_PATTERNS if p.search(text))
     profile["uses_openshift"] = oc_count >= 2
 
     # Tools and locations
@@ -201,7 +252,7 @@ def cmd_build(args):
     expected_tools = []
 
     for tool, pattern in TOOL_PATTERNS.items():
-        if re.search(pattern, text_lower):
+        if pattern.search(text):
             expected_tools.append(tool)
             if tool == 'lab':
                 workstation_tools.append(tool)
@@ -222,49 +273,32 @@ def cmd_build(args):
 
     # Teaching patterns
     profile["has_intentional_errors"] = any(
-        re.search(p, text_lower) for p in INTENTIONAL_ERROR_PATTERNS
+        p.search(text) for p in INTENTIONAL_ERROR_PATTERNS
     )
     profile["progressive_exercises"] = bool(
-        re.search(r'previous\s+exercise|building\s+on|continuation\s+of', text_lower)
+        re.search(r'previous\s+exercise|building\s+on|continuation\s+of', text, _I)
     )
 
     # Conventions
-    profile["uses_sol_files"] = bool(re.search(r'\.sol\b', text_lower))
-    profile["uses_solve_playbooks"] = bool(re.search(r'lab\s+solve|solve\s+playbook', text_lower))
-    profile["uses_lab_grade"] = bool(re.search(r'lab\s+grade', text_lower))
+    profile["uses_sol_files"] = bool(re.search(r'\.sol\b', text, _I))
+    profile["uses_solve_playbooks"] = bool(re.search(r'lab\s+solve|solve\s+playbook', text, _I))
+    profile["uses_lab_grade"] = bool(re.search(r'lab\s+grade', text, _I))
 
     # VM authentication
-    ssh_key_count = sum(1 for p in VM_SSH_KEY_PATTERNS if re.search(p, text_lower))
-    password_count = sum(1 for p in VM_PASSWORD_PATTERNS if re.search(p, text_lower))
+    ssh_key_count = sum(1 for p in VM_SSH_KEY_PATTERNS if p.search(text))
+    password_count = sum(1 for p in VM_PASSWORD_PATTERNS if p.search(text))
     profile["vm_auth"] = "ssh_keys" if ssh_key_count >= 2 else ("password" if password_count >= 2 else "unknown")
-    pw_match = re.search(r'log\s*in\s+as\s+(?:the\s+)?root\s+user\s+with\s+(\w+)\s+as\s+the\s+password', text_lower)
-    profile["vm_default_password"] = pw_match.group(1) if pw_match else None
+    pw_match = re.search(r'log\s*in\s+as\s+(?:the\s+)?root\s+user\s+with\s+(\w+)\s+as\s+the\s+password', text, _I)
+    profile["vm_default_password"] = pw_match.group(1).lower() if pw_match else None
 
     # Real hosts
-    real_hosts = []
-    for host in STANDARD_HOSTS:
-        if host in text_lower:
-            real_hosts.append(host)
-    profile["real_hosts"] = sorted(real_hosts)
+    profile["real_hosts"] = sorted({h.lower() for h in _HOST_RE.findall(text)})
 
     # Collections — filter out hostname FQDNs that look like namespace.collection
     collections = set()
-    # Patterns that are hostnames, not Ansible collections
-    hostname_patterns = [
-        r'^server[a-e]\.lab$',
-        r'^[a-z]+\.lab$',         # *.lab.example.com hostnames
-        r'^[a-z]+\.example$',     # *.example.com hostnames
-        r'^console\.redhat$',     # console.redhat.com
-        r'^docs\.ansible$',       # docs.ansible.com
-        r'^galaxy\.ansible$',     # galaxy.ansible.com
-    ]
-    for match in re.finditer(r'\b([a-z_]+\.[a-z_]+)\.[a-z_]+\b', text_lower):
-        collection = match.group(1)
-        if collection == 'ansible.builtin':
-            continue
-        if any(collection.startswith(p) for p in ['www.', 'e.g.', 'i.e.']):
-            continue
-        if any(re.match(hp, collection) for hp in hostname_patterns):
+    for match in _COLLECTION_RE.finditer(text):
+        collection = match.group(1).lower()
+        if _COLLECTION_EXCLUDE.match(collection):
             continue
         collections.add(collection)
     profile["referenced_collections"] = sorted(collections)
@@ -13,14 +13,42 @@ Usage:
 
     # Calculate quality score
     python3 report_tool.py score --data '[{...}, {...}]'
+
+    # Any subcommand can read its JSON from a file (or '-' for stdin)
+    python3 report_tool.py chapter --data-file results.json
+
+    # Handle many requests in one process: NDJSON in, one JSON line out each
+    #   {"cmd": "exercise"|"chapter"|"score", "data": ..., "course": ..., "chapter": ...}
+    python3 report_tool.py serve < requests.ndjson
 """
 
 import argparse
+import io
 import json
-from datetime import datetime
-from collections import defaultdict
+import sys
+import datetime
+
+from eqa_common import _output, _err, json_safe
+
+# orjson is optional: faster parsing of large --data payloads
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-from eqa_common import _err, json_safe
+
+def _loads(data):
+    """Parse a JSON document (str or bytes)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps_pretty(obj) -> str:
+    """Serialize obj as 2-space indented JSON."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2)
 
 
 # Performance budget thresholds (seconds)
@@ -30,74 +58,138 @@ PERF_BUDGETS = {
     "student_sim": 600,    # Flag if > 10 min
     "total": 900,          # Flag if > 15 min total
 }
+_PERF_BUDGET_ITEMS = tuple(PERF_BUDGETS.items())
+
+# Defect-score penalty per bug severity
+_BUG_PENALTIES = {"P0": 40, "P1": 20, "P2": 5, "P3": 1, "ENV": 0}
+
+# Known severities in report order, with index lookup and matching penalties
+_SEVERITIES = tuple(_BUG_PENALTIES)
+_SEV_INDEX = {sev: i for i, sev in enumerate(_SEVERITIES)}
+_SEV_PENALTIES = tuple(_BUG_PENALTIES.values())
+
+# Results that mean the exercise was not actually tested
+_UNTESTED = frozenset(("BLOCKED", "ENV", "SKIPPED"))
+
+# Shared read-only fallback for missing nested dicts (never mutated)
+_EMPTY: dict = {}
+
+# Markdown table row templates, bound once at import
+_BUG_ROW = "| {} | {} | {} | {} | {} | {} |\n".format
+_PERF_ROW = "| {} | {}s | {}s{} |\n".format
+_CHAPTER_ROW = "| {} | {} | {} | {} | {}s |\n".format
+_VIOLATION_ROW = "| {} | {} | {}s | {}s | +{}s |\n".format
+_ALL_BUGS_ROW = "| {} | {} | {} | {} |\n".format
+
+def _today() -> str:
+    """Return today's date as YYYY-MM-DD.
+
+    Computed per report rather than per process: `serve` stays up across
+    midnight.
+    """
+    return datetime.date.today().isoformat()
 
 
-def calculate_quality_score(results: list) -> dict:
+def _add_perf_violations(r: dict, violations: list):
+    """Append the performance budget violations of one result to violations."""
+    perf = r.get("performance") or _EMPTY
+    for phase, threshold in _PERF_BUDGET_ITEMS:
+        actual = perf.get(phase, 0)
+        if actual > threshold:
+            violations.append({
+                "exercise": r.get("exercise_id", "unknown"),
+                "phase": phase,
+                "actual": actual,
+                "budget": threshold,
+                "over_by": round(actual - threshold, 1),
+            })
+
+
+def check_perf_budgets(results: list) -> list:
+    """Check performance budgets and return violations."""
+    if not results:
+        return []
+    violations = []
+    for r in results:
+        _add_perf_violations(r, violations)
+    return violations
+
+
+def calculate_quality_score(results: list, collect_perf_violations: bool = False) -> dict:
     """Calculate a 0-100 quality score from exercise results.
 
     Components:
     - Coverage (30%): exercises tested / total
     - Defects (40%): penalty for bugs (P0=-40, P1=-20, P2=-5, P3=-1)
     - Reliability (30%): cleanup + idempotency pass rate
+
+    With collect_perf_violations, the check_perf_budgets() result is
+    gathered in the same pass and returned under "perf_violations".
     """
+    violations = [] if collect_perf_violations else None
     if not results:
-        return {"score": 0, "breakdown": {}}
+        quality = {"score": 0, "breakdown": {}}
+        if violations is not None:
+            quality["perf_violations"] = violations
+        return quality
 
+    # Single pass over results: tested/clean/idem counts and bug tallies
     total = len(results)
-    tested = sum(1 for r in results if r.get("result") not in ("BLOCKED", "ENV", "SKIPPED"))
+    tested = clean_pass = idem_pass = 0
+    total_bugs = 0
+    sev_counts = [0] * len(_SEVERITIES)
+    other_counts = {}           # unrecognised severities, no penalty
+    sev_index = _SEV_INDEX.get
+    for r in results:
+        get = r.get
+        if get("result") not in _UNTESTED:
+            tested += 1
+        if get("tc_clean") == "PASS":
+            clean_pass += 1
+        if get("tc_idem") == "PASS":
+            idem_pass += 1
+        for bug in get("bugs") or ():
+            sev = bug.get("severity") or "P3"
+            idx = sev_index(sev)
+            if idx is None:
+                other_counts[sev] = other_counts.get(sev, 0) + 1
+            else:
+                sev_counts[idx] += 1
+            total_bugs += 1
+        if violations is not None:
+            _add_perf_violations(r, violations)
 
     # Coverage (0-30)
-    coverage_pct = tested / total if total > 0 else 0
+    coverage_pct = tested / total        # total > 0: empty results returned above
     coverage_score = round(coverage_pct * 30)
 
     # Defects (0-40, penalty-based)
-    bug_penalties = {"P0": 40, "P1": 20, "P2": 5, "P3": 1, "ENV": 0}
-    total_penalty = 0
-    bug_counts = defaultdict(int)
-    for r in results:
-        for bug in r.get("bugs", []):
-            sev = bug.get("severity", "P3")
-            bug_counts[sev] += 1
-            total_penalty += bug_penalties.get(sev, 0)
+    total_penalty = sum(n * p for n, p in zip(sev_counts, _SEV_PENALTIES))
     defect_score = max(0, 40 - total_penalty)
+    defect_density = round(total_bugs / tested, 2) if tested else 0
 
     # Reliability (0-30)
-    clean_pass = sum(1 for r in results if r.get("tc_clean") == "PASS")
-    idem_pass = sum(1 for r in results if r.get("tc_idem") == "PASS")
-    reliability_denom = tested * 2 if tested > 0 else 1
+    reliability_denom = tested * 2 if tested else 1
     reliability_score = round(((clean_pass + idem_pass) / reliability_denom) * 30)
 
     score = coverage_score + defect_score + reliability_score
 
-    return {
+    bug_counts = {sev: n for sev, n in zip(_SEVERITIES, sev_counts) if n}
+    bug_counts.update(other_counts)
+
+    quality = {
         "score": min(100, score),
         "coverage_score": coverage_score,
         "defect_score": defect_score,
         "reliability_score": reliability_score,
         "coverage_pct": round(coverage_pct * 100),
-        "bug_counts": dict(bug_counts),
-        "total_bugs": sum(bug_counts.values()),
-        "defect_density": round(sum(bug_counts.values()) / tested, 2) if tested > 0 else 0,
+        "bug_counts": bug_counts,
+        "total_bugs": total_bugs,
+        "defect_density": defect_density,
     }
-
-
-def check_perf_budgets(results: list) -> list:
-    """Check performance budgets and return violations."""
-    violations = []
-    for r in results:
-        eid = r.get("exercise_id", "unknown")
-        perf = r.get("performance", {})
-        for phase, threshold in PERF_BUDGETS.items():
-            actual = perf.get(phase, 0)
-            if actual > threshold:
-                violations.append({
-                    "exercise": eid,
-                    "phase": phase,
-                    "actual": actual,
-                    "budget": threshold,
-                    "over_by": round(actual - threshold, 1),
-                })
-    return violations
+    if violations is not None:
+        quality["perf_violations"] = violations
+    return quality
 
 
 def generate_exercise_report(data: dict) -> str:
@@ -107,70 +199,90 @@ def generate_exercise_report(data: dict) -> str:
     title = data.get("title", "")
     etype = data.get("type", "GE")
     result = data.get("result", "UNKNOWN")
-    date = data.get("date", datetime.now().strftime("%Y-%m-%d"))
+    date = data["date"] if "date" in data else _today()
     summary = data.get("summary", "")
-    bugs = data.get("bugs", [])
-    perf = data.get("performance", {})
-    tc = data.get("test_categories", {})
-
-    lines = [
-        f"# Exercise QA Report: {eid}",
-        "",
-        f"**Course:** {course}",
-        f"**Exercise:** {eid} ({etype})",
-        f"**Date:** {date}",
-        f"**Result:** {result}",
-        "",
-        "## Summary",
-        summary or "No summary provided.",
-        "",
-        "## Test Results",
-        "",
-    ]
+    bugs = data.get("bugs") or ()
+    perf = data.get("performance") or _EMPTY
+    tc = data.get("test_categories") or _EMPTY
+
+    buf = io.StringIO()
+    write = buf.write
+    write(f"""# Exercise QA Report: {eid}
+
+**Course:** {course}
+**Exercise:** {eid} ({etype})
+**Date:** {date}
+**Result:** {result}
+
+## Summary
+{summary or "No summary provided."}
+
+## Test Results
+
+""")
 
     for cat_name, cat_result in tc.items():
-        lines.append(f"### {cat_name}")
+        write(f"### {cat_name}\n")
         if isinstance(cat_result, dict):
             for k, v in cat_result.items():
-                lines.append(f"- {k}: {v}")
+                write(f"- {k}: {v}\n")
         else:
-            lines.append(f"- Result: {cat_result}")
-        lines.append("")
+            write(f"- Result: {cat_result}\n")
+        write("\n")
 
     if bugs:
-        lines.append("## Bugs Found")
-        lines.append("| ID | Severity | Category | Description | Fix | Component |")
-        lines.append("|----|----------|----------|-------------|-----|-----------|")
+        write("## Bugs Found\n"
+              "| ID | Severity | Category | Description | Fix | Component |\n"
+              "|----|----------|----------|-------------|-----|-----------|\n")
         for i, bug in enumerate(bugs, 1):
-            lines.append(
-                f"| {bug.get('id', f'B{i}')} | {bug.get('severity', 'P3')} | "
-                f"{bug.get('category', '')} | {bug.get('description', '')} | "
-                f"{bug.get('fix', '')} | {bug.get('component', '')} |"
-            )
-        lines.append("")
+            get = bug.get
+            write(_BUG_ROW(
+                get('id', f'B{i}'), get('severity', 'P3'),
+                get('category', ''), get('description', ''),
+                get('fix', ''), get('component', ''),
+            ))
+        write("\n")
 
     if perf:
-        lines.append("## Performance")
-        lines.append("| Phase | Duration | Budget |")
-        lines.append("|-------|----------|--------|")
+        write("## Performance\n"
+              "| Phase | Duration | Budget |\n"
+              "|-------|----------|--------|\n")
         for phase, duration in perf.items():
             budget = PERF_BUDGETS.get(phase, "—")
             flag = " **SLOW**" if isinstance(budget, (int, float)) and duration > budget else ""
-            lines.append(f"| {phase} | {duration}s | {budget}s{flag} |")
-        lines.append("")
+            write(_PERF_ROW(phase, duration, budget, flag))
+        write("\n")
+
+    # Every line is newline-terminated; drop the last one (print() adds it)
+    return buf.getvalue()[:-1]
 
-    return "\n".join(lines)
+
+def _chapter_row(r: dict) -> str:
+    """Format one exercise's row of the chapter results table."""
+    return _CHAPTER_ROW(
+        r.get("exercise_id", "?"), r.get("type", "?"), r.get("result", "?"),
+        len(r.get("bugs") or ()), (r.get("performance") or _EMPTY).get("total", "—"),
+    )
 
 
 def generate_chapter_summary(results: list, course_code: str = "", chapter: str = "") -> str:
     """Generate markdown chapter summary from multiple exercise results."""
-    date = datetime.now().strftime("%Y-%m-%d")
+    date = _today()
     total = len(results)
-    tested = sum(1 for r in results if r.get("result") not in ("BLOCKED", "ENV", "SKIPPED"))
+    if not total:
+        return f"""# Chapter QA Summary: {course_code} Chapter {chapter}
+
+**Course:** {course_code}
+**Chapter:** {chapter}
+**Date:** {date}
+**Exercises tested:** 0/0
+
+No exercises tested."""
+    tested = sum(1 for r in results if r.get("result") not in _UNTESTED)
     passed = sum(1 for r in results if r.get("result") == "PASS")
 
-    quality = calculate_quality_score(results)
-    violations = check_perf_budgets(results)
+    quality = calculate_quality_score(results, collect_perf_violations=True)
+    violations = quality["perf_violations"]
 
     # Determine overall result
     has_p0 = quality["bug_counts"].get("P0", 0) > 0
@@ -182,91 +294,131 @@ def generate_chapter_summary(results: list, course_code: str = "", chapter: str
     else:
         overall = "PASS"
 
-    lines = [
-        f"# Chapter QA Summary: {course_code} Chapter {chapter}",
-        "",
-        f"**Course:** {course_code}",
-        f"**Chapter:** {chapter}",
-        f"**Date:** {date}",
-        f"**Exercises tested:** {tested}/{total}",
-        f"**Result:** {overall}",
-        f"**Quality Score:** {quality['score']}/100",
-        "",
-        "## Exercise Results",
-        "",
-        "| Exercise | Type | Result | Bugs | Duration |",
-        "|----------|------|--------|------|----------|",
-    ]
+    buf = io.StringIO()
+    write = buf.write
+    write(f"""# Chapter QA Summary: {course_code} Chapter {chapter}
 
-    for r in results:
-        eid = r.get("exercise_id", "?")
-        etype = r.get("type", "?")
-        result = r.get("result", "?")
-        bug_count = len(r.get("bugs", []))
-        total_time = r.get("performance", {}).get("total", "—")
-        bug_str = f"{bug_count}" if bug_count else "0"
-        lines.append(f"| {eid} | {etype} | {result} | {bug_str} | {total_time}s |")
-
-    lines.extend([
-        "",
-        "## Quality Metrics",
-        "",
-        f"- Quality score: **{quality['score']}/100** (coverage={quality['coverage_score']}, defects={quality['defect_score']}, reliability={quality['reliability_score']})",
-        f"- Total bugs: {quality['total_bugs']} ({', '.join(f'{k}: {v}' for k, v in sorted(quality['bug_counts'].items()))})" if quality['total_bugs'] else "- Total bugs: 0",
-        f"- Defect density: {quality['defect_density']} bugs/exercise",
-        f"- Coverage: {quality['coverage_pct']}%",
-        "",
-    ])
+**Course:** {course_code}
+**Chapter:** {chapter}
+**Date:** {date}
+**Exercises tested:** {tested}/{total}
+**Result:** {overall}
+**Quality Score:** {quality['score']}/100
 
-    if violations:
-        lines.extend([
-            "## Performance Budget Violations",
-            "",
-            "| Exercise | Phase | Actual | Budget | Over by |",
-            "|----------|-------|--------|--------|---------|",
-        ])
-        for v in violations:
-            lines.append(f"| {v['exercise']} | {v['phase']} | {v['actual']}s | {v['budget']}s | +{v['over_by']}s |")
-        lines.append("")
-
-    # Collect all bugs (copy to avoid mutating caller's data)
-    all_bugs = []
-    for r in results:
-        for bug in r.get("bugs", []):
-            all_bugs.append({**bug, "exercise": r.get("exercise_id", "?")})
+## Exercise Results
+
+| Exercise | Type | Result | Bugs | Duration |
+|----------|------|--------|------|----------|
+""")
 
-    if all_bugs:
-        lines.extend([
-            "## All Bugs",
-            "",
-            "| Exercise | Severity | Description | Component |",
-            "|----------|----------|-------------|-----------|",
-        ])
-        for bug in all_bugs:
-            lines.append(f"| {bug['exercise']} | {bug.get('severity', '?')} | {bug.get('description', '')} | {bug.get('component', '')} |")
-        lines.append("")
+    write("".join(map(_chapter_row, results)))
 
-    return "\n".join(lines)
+    if quality['total_bugs']:
+        # bug_counts is already in severity order (P0..P3, ENV, then others)
+        by_sev = ', '.join(f'{k}: {v}' for k, v in quality['bug_counts'].items())
+        bugs_line = f"- Total bugs: {quality['total_bugs']} ({by_sev})"
+    else:
+        bugs_line = "- Total bugs: 0"
+    write(f"""
+## Quality Metrics
+
+- Quality score: **{quality['score']}/100** (coverage={quality['coverage_score']}, defects={quality['defect_score']}, reliability={quality['reliability_score']})
+{bugs_line}
+- Defect density: {quality['defect_density']} bugs/exercise
+- Coverage: {quality['coverage_pct']}%
+
+""")
+
+    if violations:
+        write("## Performance Budget Violations\n"
+              "\n"
+              "| Exercise | Phase | Actual | Budget | Over by |\n"
+              "|----------|-------|--------|--------|---------|\n")
+        write("".join(
+            _VIOLATION_ROW(v['exercise'], v['phase'], v['actual'], v['budget'], v['over_by'])
+            for v in violations
+        ))
+        write("\n")
+
+    if quality['total_bugs']:
+        write("## All Bugs\n"
+              "\n"
+              "| Exercise | Severity | Description | Component |\n"
+              "|----------|----------|-------------|-----------|\n")
+        write("".join(
+            _ALL_BUGS_ROW(r.get("exercise_id", "?"), bug.get('severity', '?'),
+                          bug.get('description', ''), bug.get('component', ''))
+            for r in results
+            for bug in r.get("bugs") or ()
+        ))
+        write("\n")
+
+    # Every line is newline-terminated; drop the last one (print() adds it)
+    return buf.getvalue()[:-1]
+
+
+def _read_data(args):
+    """Parse the JSON payload from --data or --data-file ('-' reads stdin)."""
+    if args.data_file is None:
+        return _loads(args.data)
+    if args.data_file == "-":
+        return _loads(sys.stdin.buffer.read())
+    with open(args.data_file, "rb") as f:
+        return _loads(f.read())
 
 
 @json_safe
 def cmd_exercise(args):
-    data = json.loads(args.data)
+    data = _read_data(args)
     print(generate_exercise_report(data))
 
 
 @json_safe
 def cmd_chapter(args):
-    data = json.loads(args.data)
+    data = _read_data(args)
     print(generate_chapter_summary(data, args.course, args.chapter))
 
 
 @json_safe
 def cmd_score(args):
-    data = json.loads(args.data)
-    result = calculate_quality_score(data)
-    result["perf_violations"] = check_perf_budgets(data)
-    print(json.dumps(result, indent=2))
+    data = _read_data(args)
+    result = calculate_quality_score(data, collect_perf_violations=True)
+    print(_dumps_pretty(result))
+
+
+def _serve_request(req: dict) -> dict:
+    """Run one serve-mode request and return its JSON response."""
+    cmd = req.get("cmd")
+    data = req.get("data")
+    if cmd == "exercise":
+        return {"success": True, "report": generate_exercise_report(data)}
+    if cmd == "chapter":
+        report = generate_chapter_summary(data, req.get("course", ""), req.get("chapter", ""))
+        return {"success": True, "report": report}
+    if cmd == "score":
+        return {"success": True, **calculate_quality_score(data, collect_perf_violations=True)}
+    return {"success": False, "error": f"Unknown cmd: {cmd!r} (expected exercise, chapter or score)"}
+
+
+@json_safe
+def cmd_serve(args):
+    """Answer NDJSON requests from stdin until EOF, one JSON line per request."""
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+        try:
+            response = _serve_request(_loads(line))
+        except Exception as e:
+            response = {"success": False, "error": f"{type(e).__name__}: {e}"}
+        _output(response)
+
+
+def _add_data_args(parser, help_text):
+    """Add the mutually exclusive --data / --data-file options."""
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--data", help=help_text)
+    group.add_argument("--data-file", metavar="PATH",
+                       help=f"File containing the {help_text} ('-' for stdin)")
 
 
 def main():
@@ -274,19 +426,22 @@ def main():
     subparsers = parser.add_subparsers(dest="subcommand", required=True)
 
     p = subparsers.add_parser("exercise")
-    p.add_argument("--data", required=True, help="JSON exercise result")
+    _add_data_args(p, "JSON exercise result")
     p.set_defaults(func=cmd_exercise)
 
     p = subparsers.add_parser("chapter")
-    p.add_argument("--data", required=True, help="JSON array of exercise results")
+    _add_data_args(p, "JSON array of exercise results")
     p.add_argument("--course", default="")
     p.add_argument("--chapter", default="")
     p.set_defaults(func=cmd_chapter)
 
     p = subparsers.add_parser("score")
-    p.add_argument("--data", required=True, help="JSON array of exercise results")
+    _add_data_args(p, "JSON array of exercise results")
     p.set_defaults(func=cmd_score)
 
+    p = subparsers.add_parser("serve", help="Process NDJSON requests from stdin")
+    p.set_defaults(func=cmd_serve)
+
     args = parser.parse_args()
     args.func(args)
 
@@ -9,6 +9,7 @@ Usage:
     python3 ssh_tool.py run <command> [--timeout 120]
     python3 ssh_tool.py lab <action> <exercise> [--timeout 300]
     python3 ssh_tool.py write-file <remote_path> --content <base64>
+    python3 ssh_tool.py write-file <remote_path> --content-file <local_path|->
     python3 ssh_tool.py read-file <remote_path>
     python3 ssh_tool.py interactive <command> --prompts '<json_array>'
     python3 ssh_tool.py devcontainer-start <project_dir>
@@ -18,21 +19,44 @@ Usage:
 """
 
 import argparse
+import contextlib
 import functools
+import io
 import json
 import os
 import re
+import selectors
 import shlex
 import subprocess
 import sys
+import threading
 import time
-import uuid
+from collections import deque
 
 from eqa_common import _output, _err, get_cache_dir, get_state_path, load_state, save_state, json_safe, debug_log
 
 
 STATE_FILE = get_state_path("ssh")
 
+# OSC sequences (terminal titles, OSC 8 hyperlinks etc.) terminated by BEL
+# or ST, and ECMA-48 Fe + CSI sequences.  OSC comes first so its body is
+# consumed rather than leaking after a bare "ESC ]" match; the body stops
+# at the first ESC so an ST-terminated OSC can't run on to a later BEL.
+_ANSI_RE = re.compile(
+    r'\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)'
+    r'|\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])'
+)
+
+# C0 control characters other than \t, \n and \r, deleted with
+# str.translate once escape sequences are gone; probing for each with
+# `in` first is far cheaper than translating clean output.
+_CONTROL_CHARS = tuple(map(chr, (*range(0x00, 0x09), 0x0b, 0x0c, *range(0x0e, 0x20))))
+_CONTROL_DELETE = dict.fromkeys(map(ord, _CONTROL_CHARS))
+
+# Leading spinner/indicator characters plus an optional result keyword;
+# what follows is the "core" message used to collapse spinner runs.
+_CORE_PREFIX = re.compile(r'[^a-zA-Z0-9]*(?:(?:SUCCESS|FAIL|WARNING)\s+)?', re.IGNORECASE)
+
 
 def _strip_ansi(text: str, strip_spinners: bool = True) -> str:
     """Strip ANSI escape codes and control characters from output.
@@ -43,10 +67,12 @@ def _strip_ansi(text: str, strip_spinners: bool = True) -> str:
             and collapse empty lines. Set to False for VM command output
             where all content should be preserved.
     """
-    text = re.sub(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])', '', text)  # ECMA-48 Fe + CSI sequences
-    text = re.sub(r'\x1b\][^\x07]*\x07', '', text)       # OSC sequences
-    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', text)  # control chars
-    text = text.replace('\r\n', '\n').replace('\r', '\n')  # normalize line endings
+    if '\x1b' in text:
+        text = _ANSI_RE.sub('', text)
+    if any(c in text for c in _CONTROL_CHARS):
+        text = text.translate(_CONTROL_DELETE)
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')  # normalize line endings
 
     if not strip_spinners:
         return text
@@ -61,26 +87,24 @@ def _strip_ansi(text: str, strip_spinners: bool = True) -> str:
     # message, then keep only the LAST line in each consecutive run
     # of identical messages. This naturally keeps the SUCCESS/FAIL line
     # and drops all the spinner repetitions before it.
-    _RESULT_PREFIX = re.compile(r'^(?:SUCCESS|FAIL|WARNING)\s+', re.IGNORECASE)
-
-    lines = text.split('\n')
     filtered = []
+    append = filtered.append
+    match_prefix = _CORE_PREFIX.match
     prev_core = None
     prev_line = None
-    for line in lines:
+    for line in text.split('\n'):
         stripped = line.strip()
         if not stripped:
             continue
-        # Extract core message: strip leading non-alnum (spinner char),
-        # then strip result prefix (SUCCESS/FAIL/WARNING)
-        msg = re.sub(r'^[^a-zA-Z0-9]*', '', stripped)
-        core = _RESULT_PREFIX.sub('', msg)
+        # Extract core message: strip leading non-alnum (spinner char)
+        # and result prefix (SUCCESS/FAIL/WARNING) in one match
+        core = stripped[match_prefix(stripped).end():]
         if core == prev_core and prev_core:
             # Same core message — replace with this line (keep last)
             prev_line = line
         else:
             if prev_line is not None:
-                filtered.append(prev_line)
+                append(prev_line)
             prev_core = core
             prev_line = line
     if prev_line is not None:
@@ -88,29 +112,240 @@ def _strip_ansi(text: str, strip_spinners: bool = True) -> str:
     return '\n'.join(filtered)
 
 
+# Never allocate a PTY for captured commands: lab and friends then see a
+# non-terminal and emit less cursor/spinner noise for _strip_ansi to undo.
+# BatchMode keeps a direct (non-multiplexed) fallback connection from ever
+# stalling on a password or host-key prompt.
+_SSH_BASE_OPTS = (
+    '-T',
+    '-o', 'BatchMode=yes',
+    '-o', 'ConnectTimeout=10',
+    '-o', 'ServerAliveInterval=30',
+    '-o', 'ServerAliveCountMax=3',
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _ssh_opts_for(control_path: str) -> list:
+    return ['-o', f'ControlPath={control_path}', *_SSH_BASE_OPTS]
+
+
 def _ssh_opts(state: dict) -> list:
-    """Common SSH options."""
+    """Common SSH options.
+
+    The list is built once per control path and shared between calls;
+    callers concatenate it and must not mutate it.
+    """
+    return _ssh_opts_for(state["control_path"])
+
+
+# sockaddr_un.sun_path holds 104 bytes on macOS (108 on Linux), and ssh
+# first binds the master socket under a name 17 characters longer.
+_SUN_PATH_BUDGET = 104 - 17
+
+
+def _control_path(host: str) -> str:
+    """Return the ControlMaster socket path for host.
+
+    Normally ~/.cache/eqa/ssh-<host>.sock; a long home directory or host
+    alias that would overflow sun_path falls back to a short hash of the
+    host name.
+    """
+    cache_dir = get_cache_dir()
+    path = os.path.join(cache_dir, f"ssh-{host}.sock")
+    if len(path.encode()) >= _SUN_PATH_BUDGET:
+        import hashlib
+        digest = hashlib.sha1(host.encode()).hexdigest()[:12]
+        path = os.path.join(cache_dir, f"ssh-{digest}.sock")
+    return path
+
+
+def _master_cmd(host: str, control_path: str) -> list:
+    """Command line that starts the backgrounded ControlMaster for host.
+
+    Compression is negotiated once for the master's transport and then
+    applies to every session multiplexed over it (lab output, read-file,
+    write-file); per-session -C/-c options would be ignored.  The same
+    goes for keepalives: the master probes every 15s and drops a dead
+    link after 45s, failing every multiplexed session with it.
+    """
     return [
-        '-o', f'ControlPath={state["control_path"]}',
-        '-o', 'ConnectTimeout=10',
-        '-o', 'ServerAliveInterval=30',
+        'ssh',
+        '-o', f'ControlPath={control_path}',
+        '-o', 'ControlMaster=yes',
+        '-o', 'ControlPersist=600',
+        '-o', 'ConnectTimeout=15',
+        '-o', 'ServerAliveInterval=15',
         '-o', 'ServerAliveCountMax=3',
+        '-o', 'Compression=yes',
+        '-N', '-f',
+        host,
     ]
 
 
-def _ssh_exec(state, cmd, timeout=120, input_data=None):
-    """Run command over SSH. Returns (success, stdout, stderr, rc, duration)."""
+def _ssh_exec(state, cmd, timeout=120, input_data=None, strip=True):
+    """Run command over SSH. Returns (success, stdout, stderr, rc, duration).
+
+    If the master refuses the session (ssh exits 255 with a mux session
+    error, so the command never ran), restarts the master if it is dead
+    and retries once.
+    Pass strip=False when the output is discarded to skip _strip_ansi.
+    """
+    return _retry_refused_session(
+        state, lambda: _ssh_exec_once(state, cmd, timeout, input_data, strip))
+
+
+def _retry_refused_session(state, attempt):
+    """Call attempt() again if the master refused its session.
+
+    attempt returns an _ssh_exec-style tuple; on exit 255 with a mux
+    session error the command never ran, so the master is restarted if
+    it is dead and attempt is retried once.
+    """
+    result = attempt()
+    if result[3] == 255 and _MUX_FAILURE_RE.search(result[2]):
+        _err("ControlMaster refused the session, retrying...")
+        if _reconnect(state) is None:
+            result = attempt()
+    return result
+
+
+def _ssh_exec_bounded(state, cmd, timeout, tail_bytes=None):
+    """_ssh_exec for long-running commands that must not outlive timeout.
+
+    Killing the local ssh client on timeout does not stop the remote
+    command (there is no PTY to deliver SIGHUP), so it is also wrapped in
+    coreutils timeout, which fires first and kills the remote process
+    group.  Returns the same tuple as _ssh_exec.
+
+    With tail_bytes, output is read incrementally and only the last
+    tail_bytes of each stream are kept, so hour-long test runs cannot
+    balloon memory; dropped output is flagged at the top of stdout.
+    """
+    wrapped = f"timeout -k 10 {timeout} bash -c {shlex.quote(cmd)}"
+    if tail_bytes:
+        result = _ssh_exec_tail(state, wrapped, timeout + 15, tail_bytes)
+    else:
+        result = _ssh_exec(state, wrapped, timeout=timeout + 15)
+    ok, stdout, stderr, rc, duration = result
+    # timeout(1) exits 124 when it fires, but so may the command itself;
+    # only a run that lasted the full budget is the wrapper's doing
+    if rc == 124 and duration >= timeout:
+        message = f"Command timed out after {timeout}s"
+        return (False, stdout, f"{stderr}\n{message}" if stderr else message, -1, duration)
+    return ok, stdout, stderr, rc, duration
+
+
+def _ssh_exec_tail(state, cmd, timeout, tail_bytes):
+    """Run command over SSH keeping only the tail of stdout and stderr.
+
+    Retries a session the master refused, like _ssh_exec.
+    Returns (success, stdout, stderr, rc, duration).
+    """
+    return _retry_refused_session(
+        state, lambda: _ssh_exec_tail_once(state, cmd, timeout, tail_bytes))
+
+
+def _ssh_exec_tail_once(state, cmd, timeout, tail_bytes):
+    """Single _ssh_exec_tail attempt, without the reconnect retry.
+
+    Both pipes are drained through a selector as data arrives; each is
+    held in a deque of chunks trimmed from the front once it exceeds
+    tail_bytes.  On a local timeout the tail collected so far is still
+    returned, since it shows where the run hung.
+    """
+    debug_log(f"exec-tail cmd={cmd!r} timeout={timeout} tail={tail_bytes}", caller="ssh")
+    start_time = time.time()
+    try:
+        proc = subprocess.Popen(
+            ['ssh'] + _ssh_opts(state) + [state["host"], cmd],
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+    except Exception as e:
+        debug_log(f"exec-tail ERROR {e} cmd={cmd!r}", caller="ssh", level=40)
+        return (False, "", f"Execution error: {e}", -1, round(time.time() - start_time, 2))
+    out_fd, err_fd = proc.stdout.fileno(), proc.stderr.fileno()
+    # fd -> [chunks, buffered size, bytes dropped]
+    tails = {out_fd: [deque(), 0, 0], err_fd: [deque(), 0, 0]}
+    deadline = start_time + timeout
+    timed_out = False
+    error = None
+    try:
+        with selectors.DefaultSelector() as sel:
+            for fd in tails:
+                sel.register(fd, selectors.EVENT_READ)
+            while sel.get_map():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                for key, _ in sel.select(remaining):
+                    chunk = os.read(key.fd, 65536)
+                    if not chunk:
+                        sel.unregister(key.fd)
+                        continue
+                    tail = tails[key.fd]
+                    tail[0].append(chunk)
+                    tail[1] += len(chunk)
+                    while tail[1] > tail_bytes and len(tail[0]) > 1:
+                        dropped = len(tail[0].popleft())
+                        tail[1] -= dropped
+                        tail[2] += dropped
+    except Exception as e:
+        error = e
+    finally:
+        if timed_out or error:
+            proc.kill()
+        rc = proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+    duration = time.time() - start_time
+
+    out, err = (
+        _strip_ansi(b"".join(tails[fd][0]).decode("utf-8", "replace"))
+        for fd in (out_fd, err_fd)
+    )
+    dropped = tails[out_fd][2]
+    if dropped:
+        out = f"[... {dropped} bytes of earlier output truncated ...]\n{out}"
+    if timed_out or error:
+        if timed_out:
+            message = f"Command timed out after {timeout}s"
+            debug_log(f"exec-tail TIMEOUT after {timeout}s cmd={cmd!r}", caller="ssh",
+                      level=40)  # WARNING
+        else:
+            message = f"Execution error: {error}"
+            debug_log(f"exec-tail ERROR {error} cmd={cmd!r}", caller="ssh", level=40)
+        return (False, out, f"{err}\n{message}" if err else message, -1, round(duration, 2))
+    debug_log(f"exec-tail rc={rc} duration={duration:.2f}s dropped={dropped}", caller="ssh")
+    return rc == 0, out, err, rc, round(duration, 2)
+
+
+def _ssh_exec_once(state, cmd, timeout, input_data, strip=True):
+    """Single _ssh_exec attempt, without the reconnect retry.
+
+    Output is captured as bytes and decoded once as UTF-8, with invalid
+    sequences replaced; text-mode pipes would decode strictly (failing
+    on binary files) and spend another pass translating newlines, which
+    _strip_ansi normalizes anyway.  input_data may be str or bytes.
+    """
     debug_log(f"exec cmd={cmd!r} timeout={timeout}", caller="ssh")
     start_time = time.time()
+    if isinstance(input_data, str):
+        input_data = input_data.encode()
     try:
         result = subprocess.run(
             ['ssh'] + _ssh_opts(state) + [state["host"], cmd],
-            capture_output=True, text=True, timeout=timeout,
-            input=input_data,
+            capture_output=True, timeout=timeout, input=input_data,
         )
         duration = time.time() - start_time
-        stdout_clean = _strip_ansi(result.stdout)
-        stderr_clean = _strip_ansi(result.stderr)
+        stdout = result.stdout.decode('utf-8', 'replace')
+        stderr = result.stderr.decode('utf-8', 'replace')
+        if strip:
+            stdout_clean = _strip_ansi(stdout)
+            stderr_clean = _strip_ansi(stderr)
+        else:
+            stdout_clean, stderr_clean = stdout, stderr
         debug_log(
             f"exec rc={result.returncode} duration={duration:.2f}s"
             f" stdout={stdout_clean[:500]!r}"
@@ -136,13 +371,21 @@ def _ssh_exec(state, cmd, timeout=120, input_data=None):
 
 
 def requires_connection(func):
-    """Decorator: load state and verify connection before running command."""
+    """Decorator: load state and verify connection before running command.
+
+    The check is a stat of the control socket; a master that died with
+    its socket still in place is handled by _ssh_exec's retry instead.
+    """
     @functools.wraps(func)
     def wrapper(args):
         state = load_state(STATE_FILE)
         if not state:
             _output({"success": False, "error": "Not connected. Run 'connect' first."})
             return
+        error = _ensure_master(state)
+        if error:
+            _output({"success": False, "error": error})
+            return
         return func(args, state)
     return wrapper
 
@@ -179,18 +422,49 @@ def _resolve_ssh_config_files(config_path: str) -> list:
     return files
 
 
+# Last _detect_workstation answer, keyed by the stat of the config files
+# it was parsed from
+_WORKSTATION_CACHE_FILE = get_state_path("ssh-workstation")
+
+
+def _config_fingerprint(paths: list) -> list | None:
+    """Return [path, mtime_ns, size] for each path, or None if one is gone."""
+    fingerprint = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        fingerprint.append([path, st.st_mtime_ns, st.st_size])
+    return fingerprint
+
+
 def _detect_workstation() -> str:
     """Auto-detect workstation hostname from ~/.ssh/config.
 
     Looks for hosts named 'workstation', or containing 'workstation' in
     their hostname. Follows Include directives to find hosts defined in
     included config files. Falls back to 'workstation' if not found.
+    The answer is cached until any of the resolved config files changes.
     """
     config_path = os.path.expanduser("~/.ssh/config")
     config_files = _resolve_ssh_config_files(config_path)
     if not config_files:
         return "workstation"
 
+    fingerprint = _config_fingerprint(config_files)
+    cached = load_state(_WORKSTATION_CACHE_FILE)
+    if fingerprint and cached.get("fingerprint") == fingerprint and cached.get("alias"):
+        return cached["alias"]
+
+    alias = _parse_workstation(config_files)
+    if fingerprint:
+        save_state(_WORKSTATION_CACHE_FILE, {"fingerprint": fingerprint, "alias": alias})
+    return alias
+
+
+def _parse_workstation(config_files: list) -> str:
+    """Scan ssh config files for the workstation alias (uncached)."""
     try:
         current_host = None
         current_hostname = None
@@ -203,13 +477,17 @@ def _detect_workstation() -> str:
                         line = line.strip()
                         if not line or line.startswith('#'):
                             continue
-                        if line.lower().startswith('host '):
+                        parts = line.split(None, 1)
+                        if len(parts) < 2:
+                            continue
+                        keyword = parts[0].lower()
+                        if keyword == 'host':
                             if current_host and 'workstation' in current_host.lower():
                                 candidates.append((current_host, current_hostname or current_host))
-                            current_host = line.split(None, 1)[1].split()[0]
+                            current_host = parts[1].split()[0]
                             current_hostname = None
-                        elif line.lower().startswith('hostname '):
-                            current_hostname = line.split(None, 1)[1]
+                        elif keyword == 'hostname':
+                            current_hostname = parts[1]
                     # Handle last entry in this file
                     if current_host and 'workstation' in current_host.lower():
                         candidates.append((current_host, current_hostname or current_host))
@@ -245,27 +523,138 @@ def _check_connection(state: dict) -> bool:
         return False
 
 
+# Classroom subnets: non-default routes, minus the podman bridge (10.88/16)
+_SUBNETS_CMD = "ip route | grep -v default | awk '{print $1}' | grep -v '^10\\.88\\.'"
+
+# Separates the outputs of several commands batched into one SSH session
+_SECTION_MARK = "===EQA-SECTION==="
+
+
+def _parse_subnets(stdout: str) -> list:
+    """Parse the output of _SUBNETS_CMD into a list of CIDRs.
+
+    awk prints one whitespace-free field per line, so a plain split()
+    yields the stripped, non-empty entries in a single C-level pass.
+    """
+    return stdout.split()
+
+
+def _remember_subnets(state: dict, subnets: list):
+    """Cache detected subnets in the state file for later tunnel calls."""
+    if subnets and state.get("subnets") != subnets:
+        state["subnets"] = subnets
+        save_state(STATE_FILE, state)
+
+
 def _get_subnets(state):
-    """Detect classroom subnets via ip route on the remote host."""
+    """Return classroom subnets, detecting them via ip route if not cached."""
+    if state.get("subnets"):
+        return state["subnets"]
     try:
         nets = subprocess.run(
-            ['ssh'] + _ssh_opts(state) + [state["host"],
-             "ip route | grep -v default | awk '{print $1}' | grep -v '^10\\.88\\.'"],
+            ['ssh'] + _ssh_opts(state) + [state["host"], _SUBNETS_CMD],
             capture_output=True, text=True, timeout=5,
         )
         if nets.returncode == 0:
-            return [s.strip() for s in nets.stdout.strip().split('\n') if s.strip()]
+            subnets = _parse_subnets(nets.stdout)
+            _remember_subnets(state, subnets)
+            return subnets
     except Exception:
         pass
     return []
 
 
+def _partial_stdout(exc: subprocess.TimeoutExpired) -> str:
+    """Decode whatever stdout a timed-out subprocess.run had collected."""
+    out = exc.stdout or b""
+    return out.decode('utf-8', 'replace') if isinstance(out, bytes) else out
+
+
+def _batch_probe(ssh_run, probes: dict, timeout: int | None = None,
+                 probe_timeout: int = 10) -> dict:
+    """Run several probe commands in a single SSH session.
+
+    Each probe's combined stdout/stderr and exit code are framed by
+    _SECTION_MARK lines so they can be split apart locally.  The rc line
+    is preceded by a newline so output lacking a final one (e.g., a
+    file's content) still leaves the marker at the start of a line.
+    Every probe runs under its own remote `timeout probe_timeout`, so one
+    hanging command (exit 124) can't eat the whole session's budget.
+    The session timeout defaults to room for every probe to hit its own.
+    ssh_run should hand back the partial stdout when the session times
+    out, so sections completed before then are still used.
+
+    Returns {name: (rc, output)}; probes whose section is missing from
+    the output (e.g., the session timed out) map to (-1, "").
+    """
+    if timeout is None:
+        timeout = len(probes) * probe_timeout + 15
+    script = "; ".join(
+        f"echo '{_SECTION_MARK} {name}'; timeout {probe_timeout} bash -c {shlex.quote(cmd)} 2>&1; "
+        f"printf '\\n{_SECTION_MARK} rc=%s\\n' \"$?\""
+        for name, cmd in probes.items()
+    )
+    _, stdout, _ = ssh_run(script, timeout=timeout, strip=False)
+
+    results = dict.fromkeys(probes, (-1, ""))
+    section = re.compile(
+        rf'^{_SECTION_MARK} (\S+)\n(.*?)^{_SECTION_MARK} rc=(\d+)$', re.M | re.S)
+    for m in section.finditer(stdout):
+        if m.group(1) in results:
+            results[m.group(1)] = (int(m.group(3)), _strip_ansi(m.group(2)))
+    return results
+
+
+# Everything _detect_framework needs to know, gathered in one round-trip
+_FRAMEWORK_PROBES = {
+    "which_lab": "which lab 2>/dev/null",
+    "lab_v": "command -v lab >/dev/null && lab -v",
+    "lab_version": "command -v lab >/dev/null && lab --version",
+    "lab_help": "command -v lab >/dev/null && lab --help",
+    "which_uv": "which uv 2>/dev/null",
+    "grading": "test -f ~/grading/pyproject.toml && echo 'exists'",
+    "dot_grading": "test -f ~/.grading/pyproject.toml && echo 'exists'",
+}
+
+# Validated detection results are reused for this long per host
+_FRAMEWORK_CACHE_TTL = 3600
+_FRAMEWORK_CACHE_FILE = get_state_path("ssh-framework")
+
+
+def _cached_framework(host: str) -> dict | None:
+    """Return a still-fresh validated detection result for host, if any."""
+    entry = load_state(_FRAMEWORK_CACHE_FILE).get(host)
+    if not entry or time.time() - entry.get("detected_at", 0) >= _FRAMEWORK_CACHE_TTL:
+        return None
+    fw = dict(entry["result"])
+    fw["issues"] = []
+    fw["fixes_applied"] = []
+    return fw
+
+
+def _cache_framework(host: str, fw: dict):
+    """Remember a validated detection result for host.
+
+    Results built from an incomplete probe batch (a probe or the whole
+    session timed out) are never cached, so the next connect re-detects.
+    """
+    if not fw.get("validated") or not fw.get("probes_complete", True):
+        return
+    cache = load_state(_FRAMEWORK_CACHE_FILE)
+    cache[host] = {
+        "detected_at": time.time(),
+        "result": {k: v for k, v in fw.items()
+                   if k not in ("issues", "fixes_applied", "probes_complete")},
+    }
+    save_state(_FRAMEWORK_CACHE_FILE, cache)
+
+
 def _detect_framework(state: dict) -> dict:
     """Detect which lab framework is available and validate it works.
 
-    Uses a series of probes to identify the framework.  Each probe is
-    independent — if one detection method stops working, others still
-    function.  The command prefix is always 'lab' unless the only
+    Uses a series of probes to identify the framework, all run in one
+    SSH session.  Each probe is independent — if one detection method
+    stops working, others still function.  The command prefix is always 'lab' unless the only
     grading mechanism found is a uv-based Python package.
 
     After detection, validates the CLI actually works by running a simple
@@ -278,17 +667,23 @@ def _detect_framework(state: dict) -> dict:
         issues: list[str] — issues found during validation
         fixes_applied: list[str] — auto-fixes that were applied
         lab_cli_version: str|None — version string from `lab --version`
+        probes_complete: bool — False if any probe (or the batch) timed out
     """
     host = state["host"]
     opts = _ssh_opts(state)
 
-    def ssh_run(command, timeout=10):
+    def ssh_run(command, timeout=10, strip=True):
         try:
             result = subprocess.run(
                 ['ssh'] + opts + [host, command],
                 capture_output=True, text=True, timeout=timeout,
             )
+            if not strip:
+                return result.returncode, result.stdout, result.stderr
             return result.returncode, _strip_ansi(result.stdout), _strip_ansi(result.stderr)
+        except subprocess.TimeoutExpired as e:
+            stdout = _partial_stdout(e)
+            return -1, stdout if not strip else _strip_ansi(stdout), ""
         except Exception:
             return -1, "", ""
 
@@ -301,14 +696,16 @@ def _detect_framework(state: dict) -> dict:
         "lab_cli_version": None,
     }
 
+    probes = _batch_probe(ssh_run, _FRAMEWORK_PROBES)
+    result["probes_complete"] = all(rc not in (-1, 124) for rc, _ in probes.values())
+
     # Probe 1: Is there a `lab` command in PATH?
-    rc, stdout, _ = ssh_run("which lab 2>/dev/null")
+    rc, stdout = probes["which_lab"]
     if rc == 0 and stdout.strip():
         lab_path = stdout.strip()
 
         # Get version info — this tells us the framework generation
-        rc_ver, ver_out, ver_err = ssh_run("lab -v 2>&1")
-        ver_combined = ver_out + ver_err
+        _, ver_combined = probes["lab_v"]
         ver_match = re.search(r'Lab framework version:\s*(\S+)', ver_combined)
         lib_match = re.search(r'Course library version:\s*(\S+)', ver_combined)
 
@@ -319,7 +716,7 @@ def _detect_framework(state: dict) -> dict:
             major = int(fw_version.split('.')[0])
         else:
             # Fallback: try `lab --version` (DynoLabs 5 style)
-            rc_ver2, ver_out2, _ = ssh_run("lab --version 2>&1")
+            rc_ver2, ver_out2 = probes["lab_version"]
             if rc_ver2 == 0 and ver_out2.strip():
                 fw_version = ver_out2.strip()
                 result["lab_cli_version"] = fw_version
@@ -339,7 +736,7 @@ def _detect_framework(state: dict) -> dict:
         # Detect framework generation by checking available commands.
         # DynoLabs 5 (Rust CLI) has: list, force, activate, status, solve
         # DynoLabs 4 (Python CLI) has: select, fix, upgrade, system-info
-        rc_help, help_out, _ = ssh_run("lab --help 2>&1")
+        _, help_out = probes["lab_help"]
         has_list = 'list' in help_out
         has_force = 'force' in help_out
         has_select = 'select' in help_out
@@ -374,9 +771,9 @@ def _detect_framework(state: dict) -> dict:
         return result
 
     # Probe 2: uv-based Python grading (no `lab` binary in PATH)
-    rc_uv, _, _ = ssh_run("which uv 2>/dev/null")
-    for grading_dir in ['~/grading', '~/.grading']:
-        rc_g, g_out, _ = ssh_run(f"test -f {grading_dir}/pyproject.toml && echo 'exists'")
+    rc_uv, _ = probes["which_uv"]
+    for grading_dir, probe in [('~/grading', 'grading'), ('~/.grading', 'dot_grading')]:
+        rc_g, g_out = probes[probe]
         if rc_uv == 0 and rc_g == 0 and 'exists' in g_out:
             result["framework"] = "dynolabs5-python"
             result["prefix"] = f"cd {grading_dir} && uv run lab"
@@ -544,8 +941,7 @@ def _validate_and_fix_framework(result: dict, ssh_run) -> dict:
 def cmd_connect(args):
     """Start ControlMaster, detect framework, persist state."""
     host = args.host or _detect_workstation()
-    cache_dir = get_cache_dir()
-    control_path = os.path.join(cache_dir, f"ssh-{host}.sock")
+    control_path = _control_path(host)
 
     # Clean up stale socket from a dead connection
     old_state = load_state(STATE_FILE)
@@ -559,33 +955,10 @@ def cmd_connect(args):
 
     max_retries = 3
     for attempt in range(max_retries):
-        try:
-            cmd = [
-                'ssh',
-                '-o', f'ControlPath={control_path}',
-                '-o', 'ControlMaster=yes',
-                '-o', 'ControlPersist=600',
-                '-o', 'ConnectTimeout=15',
-                '-o', 'ServerAliveInterval=30',
-                '-o', 'ServerAliveCountMax=3',
-                '-N', '-f',
-                host,
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                # Verify connection
-                opts = [
-                    '-o', f'ControlPath={control_path}',
-                    '-o', 'ConnectTimeout=10',
-                ]
-                verify = subprocess.run(
-                    ['ssh'] + opts + [host, 'echo', 'connected'],
-                    capture_output=True, text=True, timeout=10,
-                )
-                if verify.returncode == 0 and 'connected' in verify.stdout:
-                    break
-        except (subprocess.TimeoutExpired, Exception) as e:
-            _err(f"Attempt {attempt + 1} failed: {e}")
+        error = _start_master(host, control_path)
+        if error is None:
+            break
+        _err(f"Attempt {attempt + 1} failed: {error}")
 
         if attempt < max_retries - 1:
             delay = 2.0 * (2 ** attempt)
@@ -603,8 +976,14 @@ def cmd_connect(args):
         "framework_prefix": None,
     }
 
-    # Detect and validate lab framework
-    fw = _detect_framework(state)
+    # Detect and validate lab framework (reusing a recent result for this host)
+    fw = None if args.refresh else _cached_framework(host)
+    fw_cached = fw is not None
+    if fw_cached:
+        _err(f"Using cached framework detection: {fw['framework']}")
+    else:
+        fw = _detect_framework(state)
+        _cache_framework(host, fw)
     state["framework"] = fw["framework"]
     state["framework_prefix"] = fw["prefix"]
     state["framework_validated"] = fw["validated"]
@@ -626,18 +1005,45 @@ def cmd_connect(args):
         "framework_fixes_applied": fw["fixes_applied"],
         "lab_cli_version": fw["lab_cli_version"],
         "capabilities": fw.get("capabilities", {}),
+        "framework_cached": fw_cached,
     })
 
 
+def _status_probe(state: dict) -> tuple[str | None, list]:
+    """Fetch free disk space and classroom subnets in one SSH session."""
+    probe = (f"df -h / --output=avail,pcent | tail -1; "
+             f"echo '{_SECTION_MARK}'; {_SUBNETS_CMD}")
+    try:
+        out = subprocess.run(
+            ['ssh'] + _ssh_opts(state) + [state["host"], probe],
+            capture_output=True, text=True, timeout=5,
+        )
+    except Exception:
+        return None, []
+    disk_out, sep, nets_out = out.stdout.partition(_SECTION_MARK)
+    return disk_out.strip() or None, _parse_subnets(nets_out) if sep else []
+
+
 @json_safe
 def cmd_status(args):
     """Check connection status, framework info, and disk space."""
+    from concurrent.futures import ThreadPoolExecutor
+
     state = load_state(STATE_FILE)
     if not state:
         _output({"success": True, "connected": False, "message": "No active connection"})
         return
 
-    alive = _check_connection(state)
+    # The socket check and the disk/subnet probe are independent round-trips
+    # over the same master, so run them side by side.  The probe is only
+    # started when the socket exists, and its output is discarded if the
+    # check then fails.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        check = pool.submit(_check_connection, state)
+        probe = (pool.submit(_status_probe, state)
+                 if os.path.exists(state.get("control_path", "")) else None)
+        alive = check.result()
+        disk_free, subnets = probe.result() if probe else (None, [])
 
     result = {
         "success": True,
@@ -650,20 +1056,11 @@ def cmd_status(args):
     }
 
     if alive:
-        # Check disk space
-        try:
-            disk = subprocess.run(
-                ['ssh'] + _ssh_opts(state) + [state["host"], "df -h / --output=avail,pcent | tail -1"],
-                capture_output=True, text=True, timeout=5,
-            )
-            if disk.returncode == 0:
-                result["disk_free"] = disk.stdout.strip()
-        except Exception:
-            pass
-
-        subnets = _get_subnets(state)
+        if disk_free:
+            result["disk_free"] = disk_free
         if subnets:
             result["subnets"] = subnets
+            _remember_subnets(state, subnets)
 
     _output(result)
 
@@ -672,10 +1069,6 @@ def cmd_status(args):
 @requires_connection
 def cmd_tunnel(args, state):
     """Generate sshuttle command for classroom network tunnel."""
-    if not _check_connection(state):
-        _output({"success": False, "error": "Connection lost. Run 'connect' again."})
-        return
-
     subnets = _get_subnets(state)
     if not subnets:
         _output({"success": False, "error": "Could not detect classroom subnets"})
@@ -691,56 +1084,97 @@ def cmd_tunnel(args, state):
     })
 
 
-@json_safe
-def cmd_run(args):
-    """Execute command via ControlMaster."""
-    state = load_state(STATE_FILE)
-    if not state:
-        _output({"success": False, "error": "Not connected. Run 'connect' first."})
-        return
+# ssh client error meaning the master refused the session, so the command
+# never ran and it is safe to run it again.  "Control socket connect" is
+# deliberately not here: on a stale socket ssh warns with it and then runs
+# the command over a direct connection anyway.
+_MUX_FAILURE_RE = re.compile(r'mux_client_request_session')
 
-    # Check for stale socket
-    if not _check_connection(state):
-        _err("ControlMaster socket is stale, reconnecting...")
-        # Attempt reconnect
-        host = state["host"]
-        cache_dir = get_cache_dir()
-        control_path = os.path.join(cache_dir, f"ssh-{host}.sock")
-        # Clean up old socket
-        old_control_path = state.get("control_path", "")
-        if old_control_path and os.path.exists(old_control_path):
-            try:
-                os.unlink(old_control_path)
-            except OSError:
-                pass
+
+def _ensure_master(state: dict) -> str | None:
+    """Restart the ControlMaster if its socket is gone.
+
+    Only a stat, so connected commands run without an extra fork; a
+    master that refuses sessions on a socket still in place is handled
+    by _ssh_exec's retry instead.
+
+    Returns None when a master socket is in place, or an error message.
+    """
+    if os.path.exists(state.get("control_path", "")):
+        return None
+    _err("ControlMaster socket is missing, reconnecting...")
+    return _reconnect(state)
+
+
+def _start_master(host: str, control_path: str) -> str | None:
+    """Launch a backgrounded ControlMaster for host on control_path.
+
+    ssh -f only backgrounds once authentication is done and the mux
+    socket is listening, so a zero exit with the socket in place proves
+    the master is up without a further round-trip through it.
+
+    Returns None on success, or a short reason for the failure.
+    """
+    try:
+        result = subprocess.run(_master_cmd(host, control_path),
+                                capture_output=True, text=True, timeout=30)
+    except Exception as e:
+        return str(e)
+    if result.returncode != 0:
+        return result.stderr.strip() or f"ssh exited with status {result.returncode}"
+    if not os.path.exists(control_path):
+        return "ssh exited without creating the control socket"
+    return None
+
+
+# devcontainer-run-batch workers can all see a refused session at once;
+# only one of them may restart the master and touch the shared state
+_RECONNECT_LOCK = threading.Lock()
+
+
+def _reconnect(state: dict) -> str | None:
+    """Start a fresh ControlMaster for state["host"] and persist it.
+
+    A master that still answers ssh -O check is left alone: the failure
+    that led here was the session, not the master, and unlinking its
+    socket would orphan it.  The check runs under _RECONNECT_LOCK, so
+    threads that queued behind a restart see the new master and reuse it.
+
+    Returns None on success, or an error message for the caller to report.
+    """
+    with _RECONNECT_LOCK:
+        return _reconnect_locked(state)
+
+
+def _reconnect_locked(state: dict) -> str | None:
+    """_reconnect body; caller holds _RECONNECT_LOCK."""
+    if _check_connection(state):
+        return None
+    host = state["host"]
+    # Recreate the master on the socket path already recorded in state;
+    # only derive a new one if state predates it.
+    control_path = state.get("control_path") or _control_path(host)
+    # Clean up old socket
+    if os.path.exists(control_path):
         try:
-            cmd = [
-                'ssh',
-                '-o', f'ControlPath={control_path}',
-                '-o', 'ControlMaster=yes',
-                '-o', 'ControlPersist=600',
-                '-o', 'ConnectTimeout=15',
-                '-o', 'ServerAliveInterval=30',
-                '-o', 'ServerAliveCountMax=3',
-                '-N', '-f',
-                host,
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            if result.returncode == 0:
-                state["control_path"] = control_path
-                save_state(STATE_FILE, state)
-                _err("Reconnected successfully")
-            else:
-                _output({"success": False, "error": "Connection lost and reconnect failed. Run 'connect' again."})
-                return
-        except Exception as e:
-            _output({"success": False, "error": f"Reconnect failed: {e}"})
-            return
+            os.unlink(control_path)
+        except OSError:
+            pass
+    error = _start_master(host, control_path)
+    if error:
+        return f"Connection lost and reconnect failed ({error}). Run 'connect' again."
+    if state.get("control_path") != control_path:
+        state["control_path"] = control_path
+        save_state(STATE_FILE, state)
+    _err("Reconnected successfully")
+    return None
 
-    command = args.command
-    timeout = args.timeout
 
-    ok, stdout, stderr, rc, duration = _ssh_exec(state, command, timeout=timeout)
+@json_safe
+@requires_connection
+def cmd_run(args, state):
+    """Execute command via ControlMaster."""
+    ok, stdout, stderr, rc, duration = _ssh_exec(state, args.command, timeout=args.timeout)
     _output({
         "success": ok,
         "return_code": rc,
@@ -750,11 +1184,17 @@ def cmd_run(args):
     })
 
 
-def _detect_blocking_lab(output: str) -> tuple[bool, str | None]:
+_BLOCKING_FINISH_RE = re.compile(r'lab finish\s+(\S+)')
+_BLOCKING_FIRST_RE = re.compile(r'finish\s+["\']?(\S+?)["\']?\s+first', re.IGNORECASE)
+_BLOCKING_ACTIVE_RE = re.compile(r'already\s+(running|active|in progress)', re.IGNORECASE)
+
+
+def _detect_blocking_lab(*streams: str) -> tuple[bool, str | None]:
     """Try to extract a blocking exercise name from lab output.
 
     Uses multiple heuristics so that a single format change doesn't
-    break auto-recovery.
+    break auto-recovery.  Each heuristic is tried against every stream
+    (e.g., stdout then stderr) before falling back to the next one.
 
     Returns (is_blocked, name):
         (False, None)  — no blocking detected
@@ -762,37 +1202,44 @@ def _detect_blocking_lab(output: str) -> tuple[bool, str | None]:
         (True, None)   — blocked but name could not be extracted
     """
     # Heuristic 1: message says "lab finish <name>"
-    m = re.search(r'lab finish\s+(\S+)', output)
-    if m:
-        return True, m.group(1)
     # Heuristic 2: message says "finish <name> first" or similar
-    m = re.search(r'finish\s+["\']?(\S+?)["\']?\s+first', output, re.IGNORECASE)
-    if m:
-        return True, m.group(1)
+    for pattern in (_BLOCKING_FINISH_RE, _BLOCKING_FIRST_RE):
+        for output in streams:
+            m = pattern.search(output)
+            if m:
+                return True, m.group(1)
     # Heuristic 3: any mention of "already running/active" + an exercise name
-    if re.search(r'already\s+(running|active|in progress)', output, re.IGNORECASE):
+    if any(_BLOCKING_ACTIVE_RE.search(output) for output in streams):
         # Blocked but can't extract the name.
         # Caller can try `lab status --reset` or ask the user.
         return True, None
     return False, None
 
 
+_FAILURE_RE = re.compile(
+    r'\bFAIL\b'          # DynoLabs 5 current format
+    r'|\bFAILED\b'       # possible variant
+    r'|\bERROR\b'        # generic error keyword
+    r'|\u2718'            # ✘ cross mark
+    r'|\u274C'            # ❌ red X
+)
+
+
 def _detect_failure(stdout: str) -> bool:
     """Check whether lab start/finish output indicates a failure.
 
     Uses multiple heuristics so the tool degrades gracefully if the
     output format changes.
     """
-    for pattern in [
-        r'\bFAIL\b',          # DynoLabs 5 current format
-        r'\bFAILED\b',        # possible variant
-        r'\bERROR\b',         # generic error keyword
-        r'\u2718',            # ✘ cross mark
-        r'\u274C',            # ❌ red X
-    ]:
-        if re.search(pattern, stdout):
-            return True
-    return False
+    return _FAILURE_RE.search(stdout) is not None
+
+
+# Grade output line formats, tried in order and matched across the whole
+# output at once ([^\S\n] is whitespace that cannot run onto the next line)
+_GRADE_PASS_FAIL_RE = re.compile(r'^[^\S\n]*(PASS|FAIL)[^\S\n]+(.+)', re.M)
+_GRADE_SYMBOL_RE = re.compile(r'^[^\S\n]*([\u2713\u2714\u2705\u2717\u2718\u274C])[^\S\n]+(.+)', re.M)
+_GRADE_PASS_SYMBOLS = frozenset('\u2713\u2714\u2705')
+_GRADE_BRACKET_RE = re.compile(r'^[^\S\n]*\[(OK|PASS|FAIL|ERROR)\][^\S\n]+(.+)', re.M | re.IGNORECASE)
 
 
 def _parse_grade_checks(stdout: str) -> list:
@@ -802,38 +1249,23 @@ def _parse_grade_checks(stdout: str) -> list:
     break grading validation.  Always returns a list (possibly empty if
     no known format matched — caller should fall back to raw stdout).
     """
-    checks = []
-
     # Format 1: "PASS  description" / "FAIL  description" (current DynoLabs)
-    for line in stdout.split('\n'):
-        m = re.match(r'\s*(PASS|FAIL)\s+(.+)', line)
-        if m:
-            checks.append({"result": m.group(1), "description": m.group(2).strip()})
-
+    checks = [{"result": result, "description": desc.strip()}
+              for result, desc in _GRADE_PASS_FAIL_RE.findall(stdout)]
     if checks:
         return checks
 
     # Format 2: checkmark/cross symbols — "✓ description" / "✗ description"
-    for line in stdout.split('\n'):
-        m = re.match(r'\s*([\u2713\u2714\u2705])\s+(.+)', line)
-        if m:
-            checks.append({"result": "PASS", "description": m.group(2).strip()})
-            continue
-        m = re.match(r'\s*([\u2717\u2718\u274C])\s+(.+)', line)
-        if m:
-            checks.append({"result": "FAIL", "description": m.group(2).strip()})
-
+    checks = [{"result": "PASS" if sym in _GRADE_PASS_SYMBOLS else "FAIL",
+               "description": desc.strip()}
+              for sym, desc in _GRADE_SYMBOL_RE.findall(stdout)]
     if checks:
         return checks
 
     # Format 3: "[OK] description" / "[FAIL] description"
-    for line in stdout.split('\n'):
-        m = re.match(r'\s*\[(OK|PASS|FAIL|ERROR)\]\s+(.+)', line, re.IGNORECASE)
-        if m:
-            result = "PASS" if m.group(1).upper() in ("OK", "PASS") else "FAIL"
-            checks.append({"result": result, "description": m.group(2).strip()})
-
-    return checks
+    return [{"result": "PASS" if tag.upper() in ("OK", "PASS") else "FAIL",
+             "description": desc.strip()}
+            for tag, desc in _GRADE_BRACKET_RE.findall(stdout)]
 
 
 @json_safe
@@ -879,21 +1311,22 @@ def cmd_lab(args, state):
 
     # If lab start fails or warns about a blocking lab, finish it and retry.
     if action == 'start':
-        output = stdout + stderr
-        is_blocked, blocking_name = _detect_blocking_lab(output)
+        is_blocked, blocking_name = _detect_blocking_lab(stdout, stderr)
         if is_blocked:
             if blocking_name:
                 _err(f"Finishing blocking lab: {blocking_name}")
-                _ssh_exec(state, f"{prefix} finish {shlex.quote(blocking_name)}", timeout=120)
+                _ssh_exec(state, f"{prefix} finish {shlex.quote(blocking_name)}", timeout=120,
+                          strip=False)
             else:
                 # Blocked but can't extract name
                 if caps.get('has_status'):
                     _err("Blocked by another lab (name unknown), attempting status reset")
-                    _ssh_exec(state, f"{prefix} status --reset", timeout=30)
+                    _ssh_exec(state, f"{prefix} status --reset", timeout=30, strip=False)
                 else:
                     _err("Blocked by another lab (name unknown). "
                          "DynoLabs 4 has no status reset — trying lab finish for this exercise.")
-                    _ssh_exec(state, f"{prefix} finish {shlex.quote(exercise)}", timeout=120)
+                    _ssh_exec(state, f"{prefix} finish {shlex.quote(exercise)}", timeout=120,
+                              strip=False)
             _err(f"Retrying: {cmd}")
             ok, stdout, stderr, rc, duration = _ssh_exec(state, cmd, timeout=timeout)
             success = ok
@@ -919,8 +1352,9 @@ def cmd_lab(args, state):
     if action == 'grade':
         checks = _parse_grade_checks(stdout)
         output_data["checks"] = checks
-        output_data["all_pass"] = all(c["result"] == "PASS" for c in checks) if checks else None
-        output_data["all_fail"] = all(c["result"] == "FAIL" for c in checks) if checks else None
+        results = {c["result"] for c in checks}
+        output_data["all_pass"] = results == {"PASS"} if checks else None
+        output_data["all_fail"] = results == {"FAIL"} if checks else None
         debug_log(f"grade parsed {len(checks)} checks all_pass={output_data['all_pass']}",
                   caller="ssh")
         if not checks:
@@ -932,6 +1366,12 @@ def cmd_lab(args, state):
     _output(output_data)
 
 
+# pexpect.spawn tuning: read up to 64 KB per syscall (default 2000 bytes)
+# and only regex-search the tail of the buffer, where prompts and exit
+# markers appear.  child.before still receives all output.
+_PEXPECT_SPAWN_KW = {"maxread": 65536, "searchwindowsize": 4096}
+
+
 @json_safe
 @requires_connection
 def cmd_interactive(args, state):
@@ -956,20 +1396,21 @@ def cmd_interactive(args, state):
               caller="ssh")
 
     start_time = time.time()
-    output_buffer = []
+    output_buffer = io.StringIO()
     matched_prompts = []
 
     try:
         ssh_cmd = (f"ssh -o ControlPath={state['control_path']} "
                    f"-o ConnectTimeout=10 "
                    f"{state['host']} {command}")
-        child = pexpect.spawn(ssh_cmd, timeout=timeout, encoding='utf-8')
+        child = pexpect.spawn(ssh_cmd, timeout=timeout, encoding='utf-8', **_PEXPECT_SPAWN_KW)
 
-        # Build pattern list: all prompt patterns + EOF + TIMEOUT
+        # Build pattern list: all prompt patterns + EOF + TIMEOUT, compiled
+        # once up front rather than by every expect() call in the loop
         patterns = [p[0] for p in prompts]
         sentinel_eof = len(patterns)
         sentinel_timeout = len(patterns) + 1
-        expect_list = patterns + [pexpect.EOF, pexpect.TIMEOUT]
+        expect_list = child.compile_pattern_list(patterns + [pexpect.EOF, pexpect.TIMEOUT])
 
         # Track which prompts have been answered (allow repeats for
         # prompts like "Confirm vault password" that appear twice)
@@ -978,9 +1419,9 @@ def cmd_interactive(args, state):
 
         while iterations < max_iterations:
             iterations += 1
-            idx = child.expect(expect_list)
+            idx = child.expect_list(expect_list)
 
-            output_buffer.append(child.before or "")
+            output_buffer.write(child.before or "")
 
             if idx == sentinel_eof:
                 debug_log("interactive: EOF reached", caller="ssh")
@@ -994,7 +1435,7 @@ def cmd_interactive(args, state):
                 _output({
                     "success": False,
                     "return_code": -1,
-                    "stdout": "".join(output_buffer),
+                    "stdout": output_buffer.getvalue(),
                     "stderr": f"Interactive command timed out after {timeout}s",
                     "duration": round(time.time() - start_time, 2),
                     "matched_prompts": matched_prompts,
@@ -1002,7 +1443,7 @@ def cmd_interactive(args, state):
                 return
             else:
                 # Matched a prompt — send the corresponding response
-                output_buffer.append(child.after or "")
+                output_buffer.write(child.after or "")
                 prompt_pattern = prompts[idx][0]
                 response = prompts[idx][1]
                 matched_prompts.append(prompt_pattern)
@@ -1017,7 +1458,7 @@ def cmd_interactive(args, state):
         _output({
             "success": exit_code == 0,
             "return_code": exit_code,
-            "stdout": "".join(output_buffer),
+            "stdout": output_buffer.getvalue(),
             "stderr": "",
             "duration": round(duration, 2),
             "matched_prompts": matched_prompts,
@@ -1026,7 +1467,7 @@ def cmd_interactive(args, state):
         _output({
             "success": False,
             "return_code": -1,
-            "stdout": "".join(output_buffer),
+            "stdout": output_buffer.getvalue(),
             "stderr": "Command ended unexpectedly",
             "duration": round(time.time() - start_time, 2),
             "matched_prompts": matched_prompts,
@@ -1035,13 +1476,33 @@ def cmd_interactive(args, state):
         _output({
             "success": False,
             "return_code": -1,
-            "stdout": "".join(output_buffer),
+            "stdout": output_buffer.getvalue(),
             "stderr": f"Interactive execution error: {e}",
             "duration": round(time.time() - start_time, 2),
             "matched_prompts": matched_prompts,
         })
 
 
+# Printed by the vm-disks script when no virt-launcher pod matches
+_NO_POD_MARK = "EQA_NO_POD"
+
+# One "target  source" row of `virsh domblklist` (header rows included)
+_VIRSH_LINE = re.compile(r'^[^\S\n]*(\S+)[^\S\n]+(\S.*?)[^\S\n]*$', re.M)
+
+
+def _disk_type(source: str) -> str:
+    """Classify a virt-launcher disk by its source path."""
+    if '/hotplug-disks/' in source:
+        return "hotplug"
+    if '/vmi-disks/' in source:
+        return "persistent"
+    if source.startswith('/dev/'):
+        return "block"
+    if 'cloud-init' in source or 'noCloud' in source:
+        return "cloudinit"
+    return "unknown"
+
+
 @json_safe
 @requires_connection
 def cmd_vm_disks(args, state):
@@ -1053,14 +1514,17 @@ def cmd_vm_disks(args, state):
     namespace = args.namespace
     timeout = args.timeout
 
-    # Get the virt-launcher pod name
-    pod_cmd = (
-        f"oc get pods -n {shlex.quote(namespace)} -l vm.kubevirt.io/name={shlex.quote(vm_name)} "
-        f"--no-headers -o custom-columns=':metadata.name' 2>&1"
+    # Resolve the virt-launcher pod and run virsh domblklist in it, all in
+    # one SSH session
+    ns = shlex.quote(namespace)
+    script = (
+        f"POD=$(oc get pods -n {ns} -l vm.kubevirt.io/name={shlex.quote(vm_name)} "
+        f"--no-headers -o custom-columns=':metadata.name' 2>/dev/null | head -1); "
+        f"[ -z \"$POD\" ] && {{ echo {_NO_POD_MARK}; exit 2; }}; "
+        f"oc exec -n {ns} \"$POD\" -- virsh domblklist 1 2>&1"
     )
-    ok, stdout, stderr, rc, duration = _ssh_exec(state, pod_cmd, timeout=30)
-    pod_name = stdout.strip()
-    if not pod_name or not ok:
+    ok, stdout, stderr, rc, duration = _ssh_exec(state, script, timeout=30 + timeout)
+    if stdout.strip() == _NO_POD_MARK:
         _output({
             "success": False,
             "error": f"No virt-launcher pod found for VM {vm_name} in {namespace}",
@@ -1068,38 +1532,22 @@ def cmd_vm_disks(args, state):
         })
         return
 
-    # Run virsh domblklist
-    virsh_cmd = f"oc exec -n {shlex.quote(namespace)} {shlex.quote(pod_name)} -- virsh domblklist 1 2>&1"
-    ok, stdout, stderr, rc, duration = _ssh_exec(state, virsh_cmd, timeout=timeout)
-
     # Parse the virsh output into structured data
     disks = []
-    for line in stdout.strip().split('\n'):
-        line = line.strip()
-        if not line or line.startswith('Target') or line.startswith('---'):
+    for target, source in _VIRSH_LINE.findall(stdout):
+        if target.startswith(('Target', '---')):
             continue
-        parts = line.split(None, 1)
-        if len(parts) == 2:
-            target, source = parts
-            disk_type = "unknown"
-            if '/hotplug-disks/' in source:
-                disk_type = "hotplug"
-            elif '/vmi-disks/' in source:
-                disk_type = "persistent"
-            elif source.startswith('/dev/'):
-                disk_type = "block"
-            elif 'cloud-init' in source or 'noCloud' in source:
-                disk_type = "cloudinit"
-            # Extract volume name from source path
-            vol_name = source.rsplit('/', 1)[-1] if '/' in source else source
-            if vol_name == 'disk.img':
-                vol_name = source.rsplit('/', 2)[-2] if source.count('/') >= 2 else vol_name
-            disks.append({
-                "target": target,
-                "source": source,
-                "type": disk_type,
-                "volume": vol_name,
-            })
+        # Extract volume name from source path
+        parts = source.rsplit('/', 2)
+        vol_name = parts[-1]
+        if vol_name == 'disk.img' and len(parts) == 3:
+            vol_name = parts[1]
+        disks.append({
+            "target": target,
+            "source": source,
+            "type": _disk_type(source),
+            "volume": vol_name,
+        })
 
     _output({
         "success": rc == 0,
@@ -1109,26 +1557,17 @@ def cmd_vm_disks(args, state):
     })
 
 
-@json_safe
-@requires_connection
-def cmd_vm_exec(args, state):
-    """Execute a command inside a KubeVirt VM.
+# virtctl ssh output meaning key auth was refused, so the console is needed
+_VM_AUTH_FAILURES = ("Permission denied", "Please login as", "publickey,gssapi")
 
-    Tries virtctl ssh first (fast, clean output). If that fails due to
-    auth issues, falls back to serial console via pexpect.
-    """
-    vm_name = args.vm_name
-    namespace = args.namespace
-    command = args.command
-    user = args.user
-    password = args.password
-    timeout = args.timeout
 
-    debug_log(f"vm-exec vm={vm_name} ns={namespace} user={user} cmd={command!r}",
-              caller="ssh")
-    start_time = time.time()
+def _vm_ssh_exec(state, vm_name, namespace, user, command, timeout):
+    """Run one command in a VM via virtctl ssh.
 
-    # Strategy 1: virtctl ssh (key-based auth)
+    Returns a result dict, or None when key auth was refused or the call
+    timed out and the caller should fall back to the serial console.
+    """
+    start_time = time.time()
     ssh_cmd = (
         f"virtctl ssh {shlex.quote(user)}@{shlex.quote(vm_name)} -n {shlex.quote(namespace)} "
         f"--command {shlex.quote(command)} -l {shlex.quote(user)} --known-hosts="
@@ -1138,40 +1577,43 @@ def cmd_vm_exec(args, state):
             ['ssh'] + _ssh_opts(state) + [state["host"], ssh_cmd],
             capture_output=True, text=True, timeout=timeout,
         )
-        stdout = _strip_ansi(result.stdout)
-        stderr = _strip_ansi(result.stderr)
-        combined = stdout + stderr
-        auth_failures = ["Permission denied", "Please login as", "publickey,gssapi"]
-        is_auth_fail = any(p in combined for p in auth_failures)
-        if result.returncode == 0 or not is_auth_fail:
-            _output({
-                "success": result.returncode == 0,
-                "return_code": result.returncode,
-                "stdout": stdout,
-                "stderr": stderr,
-                "method": "virtctl-ssh",
-                "duration": round(time.time() - start_time, 2),
-            })
-            return
     except subprocess.TimeoutExpired:
-        pass  # fall through to console
+        return None
+    stdout = _strip_ansi(result.stdout)
+    stderr = _strip_ansi(result.stderr)
+    combined = stdout + stderr
+    if result.returncode != 0 and any(p in combined for p in _VM_AUTH_FAILURES):
+        return None
+    return {
+        "success": result.returncode == 0,
+        "return_code": result.returncode,
+        "stdout": stdout,
+        "stderr": stderr,
+        "method": "virtctl-ssh",
+        "duration": round(time.time() - start_time, 2),
+    }
 
-    _err(f"virtctl ssh failed for {vm_name}, falling back to serial console")
 
-    # Strategy 2: Serial console via pexpect
-    try:
-        import pexpect
-    except ImportError:
-        _output({"success": False, "error": "pexpect not installed and virtctl ssh failed"})
-        return
+def _vm_console_exec(state, vm_name, namespace, user, password, commands, timeout):
+    """Run commands in a VM over one serial-console login.
+
+    Logging in is the slow part of the console path, so every command
+    shares a single session.  Returns one result dict per command run;
+    on a timeout or error the failing command's entry carries its partial
+    output and the remaining commands are not run.  Raises ImportError
+    when pexpect is not installed.
+    """
+    import pexpect
 
     console_cmd = (
         f"ssh -o ControlPath={state['control_path']} -o ConnectTimeout=10 "
         f"{state['host']} virtctl console {shlex.quote(vm_name)} -n {shlex.quote(namespace)}"
     )
-    output_buffer = []
+    results = []
+    output_buffer = io.StringIO()
+    start_time = time.time()
     try:
-        child = pexpect.spawn(console_cmd, timeout=timeout, encoding='utf-8')
+        child = pexpect.spawn(console_cmd, timeout=timeout, encoding='utf-8', **_PEXPECT_SPAWN_KW)
         # Wait for console to connect, then send Enter to trigger prompt
         child.expect(r'Successfully connected|escape sequence', timeout=30)
         time.sleep(2)
@@ -1197,12 +1639,33 @@ def cmd_vm_exec(args, state):
                 child.sendline(password)
                 child.expect(r'[\]#\$]', timeout=15)
 
-        # At shell prompt — run the command with exit code marker
-        marker = f"EQA_EXIT_{uuid.uuid4().hex}"
-        child.sendline(f"{command}; echo; echo {marker}=$?")
-        child.expect(f'{marker}=(\\d+)', timeout=timeout)
-        output_buffer.append(child.before or "")
-        exit_code = int(child.match.group(1))
+        # At shell prompt — run each command with an exit code marker
+        marker = f"EQA_EXIT_{os.urandom(16).hex()}"
+        for command in commands:
+            output_buffer = io.StringIO()
+            # Capture $? before the bare echo that ensures a fresh line
+            child.sendline(f"{command}; __eqa_rc=$?; echo; echo {marker}=$__eqa_rc")
+            child.expect(f'{marker}=(\\d+)', timeout=timeout)
+            output_buffer.write(child.before or "")
+            exit_code = int(child.match.group(1))
+
+            raw_output = output_buffer.getvalue()
+            # Strip ANSI codes but preserve all content lines (no spinner filtering)
+            clean_output = _strip_ansi(raw_output, strip_spinners=False)
+            # Remove the echoed command from the output
+            lines = clean_output.split('\n')
+            filtered = [l for l in lines if command not in l and marker not in l]
+            clean_output = '\n'.join(filtered).strip()
+
+            results.append({
+                "success": exit_code == 0,
+                "return_code": exit_code,
+                "stdout": clean_output,
+                "stderr": "",
+                "method": "console",
+                "duration": round(time.time() - start_time, 2),
+            })
+            start_time = time.time()
 
         # Logout
         child.sendline("exit")
@@ -1211,54 +1674,118 @@ def cmd_vm_exec(args, state):
         except (pexpect.TIMEOUT, pexpect.EOF):
             pass
         child.close()
-
-        raw_output = "".join(output_buffer)
-        # Strip ANSI codes but preserve all content lines (no spinner filtering)
-        clean_output = _strip_ansi(raw_output, strip_spinners=False)
-        # Remove the echoed command from the output
-        lines = clean_output.split('\n')
-        filtered = [l for l in lines if command not in l and marker not in l]
-        clean_output = '\n'.join(filtered).strip()
-
-        _output({
-            "success": exit_code == 0,
-            "return_code": exit_code,
-            "stdout": clean_output,
-            "stderr": "",
-            "method": "console",
-            "duration": round(time.time() - start_time, 2),
-        })
     except pexpect.TIMEOUT:
-        _output({
+        results.append({
             "success": False,
             "return_code": -1,
-            "stdout": "".join(output_buffer),
+            "stdout": output_buffer.getvalue(),
             "stderr": f"VM console timed out after {timeout}s",
             "method": "console",
             "duration": round(time.time() - start_time, 2),
         })
     except Exception as e:
-        _output({
+        results.append({
             "success": False,
             "return_code": -1,
-            "stdout": "".join(output_buffer),
+            "stdout": output_buffer.getvalue(),
             "stderr": f"VM exec error: {e}",
             "method": "console",
             "duration": round(time.time() - start_time, 2),
         })
+    return results
+
+
+@json_safe
+@requires_connection
+def cmd_vm_exec(args, state):
+    """Execute commands inside a KubeVirt VM.
+
+    Tries virtctl ssh first (fast, clean output). If that fails due to
+    auth issues, falls back to serial console via pexpect, running all
+    remaining commands in one console login.  With a single --command the
+    result is reported flat; with several, as a "results" list in order.
+    """
+    vm_name = args.vm_name
+    namespace = args.namespace
+    commands = args.command
+    user = args.user
+    password = args.password
+    timeout = args.timeout
+
+    debug_log(f"vm-exec vm={vm_name} ns={namespace} user={user} cmds={commands!r}",
+              caller="ssh")
+    start_time = time.time()
+
+    def report(results):
+        if len(commands) == 1:
+            _output(results[0])
+            return
+        _output({
+            "success": len(results) == len(commands) and all(r["success"] for r in results),
+            "results": results,
+            "duration": round(time.time() - start_time, 2),
+        })
+
+    # Strategy 1: virtctl ssh (key-based auth)
+    results = []
+    for command in commands:
+        result = _vm_ssh_exec(state, vm_name, namespace, user, command, timeout)
+        if result is None:
+            break
+        results.append(result)
+    else:
+        report(results)
+        return
+
+    _err(f"virtctl ssh failed for {vm_name}, falling back to serial console")
+
+    # Strategy 2: Serial console via pexpect
+    remaining = commands[len(results):]
+    try:
+        results += _vm_console_exec(state, vm_name, namespace, user, password, remaining, timeout)
+    except ImportError:
+        _output({"success": False, "error": "pexpect not installed and virtctl ssh failed"})
+        return
+    report(results)
 
 
 @json_safe
 @requires_connection
 def cmd_write_file(args, state):
-    """Write file to remote system via base64 encoding."""
+    """Write file to remote system.
+
+    Content comes either base64-encoded from --content, or raw from
+    --content-file (a local path, or '-' for stdin), which keeps large
+    payloads out of the argv and clear of ARG_MAX.  Either way it is
+    decoded locally and the raw bytes are piped through ssh's stdin,
+    avoiding base64's 33% overhead on the wire.
+    """
+    import base64
+
     remote_path = args.remote_path
-    content_b64 = args.content
+    if args.content_file is not None:
+        try:
+            if args.content_file == '-':
+                raw = sys.stdin.buffer.read()
+            else:
+                with open(os.path.expanduser(args.content_file), 'rb') as f:
+                    raw = f.read()
+        except OSError as e:
+            _output({"success": False, "error": f"Cannot read {args.content_file}: {e}"})
+            return
+    else:
+        try:
+            raw = base64.b64decode(args.content)
+        except ValueError as e:
+            _output({"success": False, "error": f"Invalid base64 content: {e}"})
+            return
 
     quoted_path = shlex.quote(remote_path)
-    cmd = f"mkdir -p \"$(dirname {quoted_path})\" && base64 -d > {quoted_path}"
+    cmd = f"mkdir -p \"$(dirname {quoted_path})\" && cat > {quoted_path}"
 
-    ok, stdout, stderr, rc, duration = _ssh_exec(state, cmd, timeout=30, input_data=content_b64)
+    # cat prints nothing and mkdir/cat errors are plain text: skip stripping
+    ok, stdout, stderr, rc, duration = _ssh_exec(state, cmd, timeout=30, input_data=raw,
+                                                 strip=False)
     _output({
         "success": ok,
         "return_code": rc,
@@ -1282,29 +1809,66 @@ def cmd_read_file(args, state):
     })
 
 
+# A container seen working this recently is trusted to still be up, so a
+# repeated devcontainer-start for the same project skips the restart
+_DEVCONTAINER_FRESH_SECS = 30
+
+
+def _devcontainer_lock(name: str) -> str:
+    """Workstation lock file held while container `name` is being removed."""
+    return shlex.quote(f"/tmp/.eqa-{name}.lock")
+
+
 @json_safe
 @requires_connection
 def cmd_devcontainer_start(args, state):
     """Parse devcontainer.json and start container on workstation."""
     project_dir = args.project_dir
     host = state["host"]
+
+    dc = state.get("devcontainer") or {}
+    if (dc.get("project_dir") == project_dir
+            and dc.get("last_ok_ts", 0) > time.time() - _DEVCONTAINER_FRESH_SECS):
+        _output({
+            "success": True,
+            "workdir": dc.get("workdir"),
+            "user": dc.get("user"),
+            "image": dc.get("image"),
+            "container_name": dc.get("name"),
+            "cached": True,
+        })
+        return
     opts = _ssh_opts(state)
 
-    def ssh_run(command, timeout=30):
-        result = subprocess.run(
-            ['ssh'] + opts + [host, command],
-            capture_output=True, text=True, timeout=timeout,
-        )
+    def ssh_run(command, timeout=30, strip=True):
+        try:
+            result = subprocess.run(
+                ['ssh'] + opts + [host, command],
+                capture_output=True, text=True, timeout=timeout,
+            )
+        except subprocess.TimeoutExpired as e:
+            stdout = _partial_stdout(e)
+            return (False, stdout if not strip else _strip_ansi(stdout),
+                    f"Command timed out after {timeout}s")
+        if not strip:
+            return result.returncode == 0, result.stdout, result.stderr
         return result.returncode == 0, _strip_ansi(result.stdout), _strip_ansi(result.stderr)
 
-    # Find devcontainer.json
-    config = None
-    for dc_path in [
+    # Read both candidate devcontainer.json files and the free disk space
+    # in one round-trip; the first candidate that parses wins
+    candidates = [
         f"{project_dir}/.devcontainer/podman/devcontainer.json",
         f"{project_dir}/.devcontainer/devcontainer.json",
-    ]:
-        ok, content, _ = ssh_run(f"cat {shlex.quote(dc_path)} 2>/dev/null")
-        if ok and content.strip():
+    ]
+    probes = {f"dc{i}": f"cat {shlex.quote(path)} 2>/dev/null"
+              for i, path in enumerate(candidates)}
+    probes["df"] = "df / --output=avail | tail -1"
+    found = _batch_probe(ssh_run, probes)
+
+    config = None
+    for i in range(len(candidates)):
+        rc, content = found[f"dc{i}"]
+        if rc == 0 and content.strip():
             try:
                 config = json.loads(content)
                 break
@@ -1327,8 +1891,8 @@ def cmd_devcontainer_start(args, state):
     exercise_name = project_dir.rstrip('/').split('/')[-1]
 
     # Check disk space before starting (need ~2GB for container + EE image)
-    ok_df, df_out, _ = ssh_run("df / --output=avail | tail -1")
-    if ok_df:
+    rc_df, df_out = found["df"]
+    if rc_df == 0:
         try:
             avail_kb = int(df_out.strip())
             avail_gb = avail_kb / (1024 * 1024)
@@ -1338,9 +1902,6 @@ def cmd_devcontainer_start(args, state):
         except (ValueError, TypeError):
             pass
 
-    # Stop any existing container
-    ssh_run(f"podman rm -f {shlex.quote(container_name)} 2>/dev/null", timeout=10)
-
     # Determine SSH mount paths
     home_dir = "/home/student"
     if container_user == "root":
@@ -1353,80 +1914,212 @@ def cmd_devcontainer_start(args, state):
     # treated as trusted project config, not raw user input
     args_str = " ".join(run_args)
     user_flag = f"--user {shlex.quote(container_user)}" if container_user else ""
-    cmd = (f"podman run -d --name {shlex.quote(container_name)} "
-           f"{user_flag} "
-           f"{args_str} "
-           f"-v {shlex.quote(project_dir)}:/workspaces/{shlex.quote(exercise_name)}:Z "
-           f"-v {home_dir}/.ssh:{container_ssh_dir}:z "
-           f"{shlex.quote(image)} sleep infinity")
-
-    ok, stdout, stderr = ssh_run(cmd, timeout=120)
-    if ok:
-        # Verify container
-        ok2, out2, _ = ssh_run(f"podman exec {shlex.quote(container_name)} echo 'ready'", timeout=15)
-        if ok2 and 'ready' in out2:
-            workdir = f"/workspaces/{exercise_name}"
-            # Save devcontainer state
-            state["devcontainer"] = {
-                "name": container_name,
-                "workdir": workdir,
-                "user": container_user,
-                "image": image,
-            }
-            save_state(STATE_FILE, state)
-
-            _output({
-                "success": True,
-                "workdir": workdir,
-                "user": container_user,
-                "image": image,
-                "container_name": container_name,
-            })
-            return
+    run_cmd = (f"podman run -d --name {shlex.quote(container_name)} "
+               f"{user_flag} "
+               f"{args_str} "
+               f"-v {shlex.quote(project_dir)}:/workspaces/{shlex.quote(exercise_name)}:Z "
+               f"-v {home_dir}/.ssh:{container_ssh_dir}:z "
+               f"{shlex.quote(image)} sleep infinity")
+
+    # One SSH session: wait out a removal still running from
+    # devcontainer-stop, remove any existing container, start the new one,
+    # verify it answers an exec, and check whether this podman can exec
+    # without session tracking (no exec lock or DB writes)
+    script = (
+        f"flock -w 30 {_devcontainer_lock(container_name)} true; "
+        f"podman rm -f {shlex.quote(container_name)} >/dev/null 2>&1; "
+        f"{run_cmd} >/dev/null && "
+        f"podman exec {shlex.quote(container_name)} echo 'ready' && "
+        f"{{ podman exec --help 2>/dev/null | grep -q -- '--no-session' && echo 'no-session' || true; }}"
+    )
+    ok, out, stderr = ssh_run(script, timeout=150)
+    if ok and 'ready' in out:
+        workdir = f"/workspaces/{exercise_name}"
+        # Save devcontainer state
+        state["devcontainer"] = {
+            "name": container_name,
+            "workdir": workdir,
+            "user": container_user,
+            "image": image,
+            "no_session": 'no-session' in out,
+            "project_dir": project_dir,
+            "last_ok_ts": time.time(),
+        }
+        save_state(STATE_FILE, state)
+
+        _output({
+            "success": True,
+            "workdir": workdir,
+            "user": container_user,
+            "image": image,
+            "container_name": container_name,
+        })
+        return
 
     _output({"success": False, "error": f"Failed to start container: {stderr}"})
 
 
-@json_safe
-@requires_connection
-def cmd_devcontainer_run(args, state):
-    """Execute command in dev container."""
+# Commands with none of these, and not starting with a shell builtin or
+# keyword, mean the same with or without a shell, so devcontainer-run
+# execs them directly instead of forking bash in the container.
+# _SHELL_BUILTINS is the output of `compgen -b -k` in bash 5.2.
+_SHELL_META_RE = re.compile(r'[|&;<>()$`\\"\'\n\t*?\[\]{}#~=%!]')
+_SHELL_BUILTINS = frozenset({
+    '!', '.', ':', '[', '[[', ']]', 'alias', 'bg', 'bind', 'break', 'builtin',
+    'caller', 'case', 'cd', 'command', 'compgen', 'complete', 'compopt',
+    'continue', 'coproc', 'declare', 'dirs', 'disown', 'do', 'done', 'echo',
+    'elif', 'else', 'enable', 'esac', 'eval', 'exec', 'exit', 'export',
+    'false', 'fc', 'fg', 'fi', 'for', 'function', 'getopts', 'hash', 'help',
+    'history', 'if', 'in', 'jobs', 'kill', 'let', 'local', 'logout', 'mapfile',
+    'popd', 'printf', 'pushd', 'pwd', 'read', 'readarray', 'readonly',
+    'return', 'select', 'set', 'shift', 'shopt', 'source', 'suspend', 'test',
+    'then', 'time', 'times', 'trap', 'true', 'type', 'typeset', 'ulimit',
+    'umask', 'unalias', 'unset', 'until', 'wait', 'while', '{', '}',
+})
+
+
+def _container_argv(command):
+    """Return the podman exec argv tail for command, shell-quoted.
+
+    Plain commands are passed through as their own argv; anything relying
+    on shell syntax or builtins is wrapped in bash -c as before.
+    """
+    if not _SHELL_META_RE.search(command):
+        tokens = command.split()
+        if tokens and tokens[0] not in _SHELL_BUILTINS:
+            return shlex.join(tokens)
+    return f"bash -c {shlex.quote(command)}"
+
+
+def _devcontainer_exec(state, command, workdir=None, user=None, timeout=120):
+    """Run one command in the dev container; return its result dict."""
     dc = state.get("devcontainer", {})
     container_name = dc.get("name", "qa-devcontainer")
-    workdir = args.workdir or dc.get("workdir")
-    user = args.user or dc.get("user")
+    workdir = workdir or dc.get("workdir")
+    user = user or dc.get("user")
 
     workdir_flag = f"-w {shlex.quote(workdir)}" if workdir else ""
     user_flag = f"--user {shlex.quote(user)}" if user else ""
-    escaped_cmd = shlex.quote(args.command)
 
-    full_cmd = f"podman exec {user_flag} {workdir_flag} {shlex.quote(container_name)} bash -c {escaped_cmd}"
+    # --no-session skips podman's exec-session bookkeeping; the exec can't
+    # be listed or detached, which devcontainer-run never does anyway
+    session_flag = "--no-session" if dc.get("no_session") else ""
 
-    ok, stdout, stderr, rc, duration = _ssh_exec(state, full_cmd, timeout=args.timeout)
-    _output({
+    full_cmd = (f"podman exec {session_flag} {user_flag} {workdir_flag} "
+                f"{shlex.quote(container_name)} {_container_argv(command)}")
+
+    ok, stdout, stderr, rc, duration = _ssh_exec_bounded(state, full_cmd, timeout)
+    return {
         "success": ok,
         "return_code": rc,
         "stdout": stdout,
         "stderr": stderr,
         "duration": duration,
+    }
+
+
+def _mark_devcontainer_alive(state, results):
+    """Refresh the devcontainer last_ok_ts if any exec reached it."""
+    dc = state.get("devcontainer")
+    # 125 is podman itself failing (e.g. container gone); anything else
+    # non-negative means the exec reached a live container
+    if dc and any(r["return_code"] >= 0 and r["return_code"] != 125 for r in results):
+        state["devcontainer"] = {**dc, "last_ok_ts": time.time()}
+        save_state(STATE_FILE, state)
+
+
+@json_safe
+@requires_connection
+def cmd_devcontainer_run(args, state):
+    """Execute command in dev container."""
+    result = _devcontainer_exec(state, args.command, args.workdir, args.user, args.timeout)
+    _mark_devcontainer_alive(state, [result])
+    _output(result)
+
+
+# Sessions the batch may hold open on one master; sshd's default
+# MaxSessions is 10, and other tool calls may share the master meanwhile
+_BATCH_MAX_CONCURRENCY = 8
+
+
+@json_safe
+@requires_connection
+def cmd_devcontainer_run_batch(args, state):
+    """Execute many commands in the dev container concurrently.
+
+    --commands is a JSON-lines file ('-' for stdin); each line is either a
+    command string or an object with "command" and optional "workdir" and
+    "user".  Execs share the ControlMaster connection, so --concurrency
+    is capped at _BATCH_MAX_CONCURRENCY, below sshd's default MaxSessions
+    of 10.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    try:
+        if args.commands == '-':
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(os.path.expanduser(args.commands)) as f:
+                lines = f.read().splitlines()
+        jobs = []
+        for line in lines:
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            jobs.append({"command": job} if isinstance(job, str) else job)
+    except (OSError, json.JSONDecodeError) as e:
+        _output({"success": False, "error": f"Cannot read commands from {args.commands}: {e}"})
+        return
+
+    if not jobs or not all(isinstance(j, dict) and j.get("command") for j in jobs):
+        _output({"success": False, "error": "Every commands line needs a non-empty command"})
+        return
+
+    def run(job):
+        return _devcontainer_exec(state, job["command"], job.get("workdir"),
+                                  job.get("user"), args.timeout)
+
+    workers = max(1, min(args.concurrency, _BATCH_MAX_CONCURRENCY, len(jobs)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run, jobs))
+
+    _mark_devcontainer_alive(state, results)
+    _output({
+        "success": all(r["success"] for r in results),
+        "results": results,
     })
 
 
 @json_safe
 @requires_connection
 def cmd_devcontainer_stop(args, state):
-    """Stop and remove dev container."""
+    """Stop and remove dev container.
+
+    The removal is detached on the workstation, so this returns after one
+    round-trip rather than waiting for podman to tear the container down.
+    The detached podman inherits a flock taken before this returns, and
+    devcontainer-start waits on that lock, so a quick restart can't race
+    the removal.  Local state is dropped first so it is consistent even
+    if the ssh call fails.
+    """
     dc = state.get("devcontainer", {})
     container_name = dc.get("name", "qa-devcontainer")
 
-    _ssh_exec(state, f"podman rm -f {shlex.quote(container_name)} 2>/dev/null", timeout=15)
     if "devcontainer" in state:
         del state["devcontainer"]
         save_state(STATE_FILE, state)
 
+    _ssh_exec(state, f"exec 9>{_devcontainer_lock(container_name)}; flock -w 10 9; "
+                     f"nohup podman rm -f {shlex.quote(container_name)} "
+                     f"</dev/null >/dev/null 2>&1 &", timeout=15, strip=False)
+
     _output({"success": True})
 
 
+# autotest/coursetest runs can log tens of MB; keep the last 4 MB per stream
+_TEST_OUTPUT_TAIL = 4 * 1024 * 1024
+
+
 @json_safe
 @requires_connection
 def cmd_autotest(args, state):
@@ -1444,7 +2137,8 @@ def cmd_autotest(args, state):
         cmd += " --ignore-errors"
 
     _err(f"Running: {cmd}")
-    ok, stdout, stderr, rc, duration = _ssh_exec(state, cmd, timeout=args.timeout)
+    ok, stdout, stderr, rc, duration = _ssh_exec_bounded(
+        state, cmd, args.timeout, tail_bytes=_TEST_OUTPUT_TAIL)
     _output({
         "success": ok,
         "return_code": rc,
@@ -1471,7 +2165,8 @@ def cmd_coursetest(args, state):
         cmd += " --dry-run"
 
     _err(f"Running: {cmd}")
-    ok, stdout, stderr, rc, duration = _ssh_exec(state, cmd, timeout=args.timeout)
+    ok, stdout, stderr, rc, duration = _ssh_exec_bounded(
+        state, cmd, args.timeout, tail_bytes=_TEST_OUTPUT_TAIL)
     _output({
         "success": ok,
         "return_code": rc,
@@ -1481,6 +2176,11 @@ def cmd_coursetest(args, state):
     })
 
 
+# Final line of the remote wait-for loop: "EQA_WAIT ok|timeout <attempts>"
+_WAIT_MARK = "EQA_WAIT"
+_WAIT_RESULT_RE = re.compile(rf'^{_WAIT_MARK} (ok|timeout) (\d+)$', re.M)
+
+
 @json_safe
 @requires_connection
 def cmd_wait_for(args, state):
@@ -1498,7 +2198,9 @@ def cmd_wait_for(args, state):
         host, port = parts[0], parts[1]
         check_cmd = f"nc -z -w1 {shlex.quote(host)} {shlex.quote(port)}"
     elif mode == "http":
-        check_cmd = f"curl -sk -o /dev/null -w '%{{http_code}}' {shlex.quote(target)}"
+        # Succeed on any 2xx/3xx status code
+        check_cmd = (f"case \"$(curl -sk -o /dev/null -w '%{{http_code}}' {shlex.quote(target)})\" "
+                     f"in 2*|3*) exit 0;; esac; exit 1")
     elif mode == "command":
         check_cmd = target
     elif mode == "file":
@@ -1507,33 +2209,40 @@ def cmd_wait_for(args, state):
         _output({"success": False, "error": f"Unknown mode: {mode}"})
         return
 
-    start_time = time.time()
-    attempts = 0
-
-    while True:
-        attempts += 1
-        ok, stdout, stderr, rc, _ = _ssh_exec(state, check_cmd, timeout=30)
-
-        if mode == "http":
-            code = stdout.strip()
-            ok = code.startswith("2") or code.startswith("3")
-
-        if ok:
-            elapsed = round(time.time() - start_time, 2)
-            _output({"success": True, "elapsed": elapsed, "attempts": attempts})
-            return
+    # Poll on the remote side so the whole wait is a single SSH session
+    # rather than one per attempt.  Each check gets the same 30s cap as a
+    # standalone call; the loop gives up once another interval would
+    # overrun the timeout.
+    script = (
+        f"n=0; while :; do n=$((n+1)); "
+        f"if timeout 30 bash -c {shlex.quote(check_cmd)} >/dev/null 2>&1; then "
+        f"echo \"{_WAIT_MARK} ok $n\"; exit 0; fi; "
+        f"if [ $((SECONDS + {interval})) -gt {timeout} ]; then "
+        f"echo \"{_WAIT_MARK} timeout $n\"; exit 0; fi; "
+        f"sleep {interval}; done"
+    )
+    ok, stdout, stderr, rc, elapsed = _ssh_exec(
+        state, f"bash -c {shlex.quote(script)}", timeout=timeout + 60)
 
-        elapsed = time.time() - start_time
-        if elapsed + interval > timeout:
-            _output({
-                "success": False,
-                "error": f"Timed out after {round(elapsed, 2)}s ({attempts} attempts)",
-                "elapsed": round(elapsed, 2),
-                "attempts": attempts,
-            })
-            return
+    m = _WAIT_RESULT_RE.search(stdout)
+    if not m:
+        _output({
+            "success": False,
+            "error": f"wait-for failed: {stderr.strip() or f'rc={rc}'}",
+            "elapsed": elapsed,
+        })
+        return
 
-        time.sleep(interval)
+    attempts = int(m.group(2))
+    if m.group(1) == "ok":
+        _output({"success": True, "elapsed": elapsed, "attempts": attempts})
+    else:
+        _output({
+            "success": False,
+            "error": f"Timed out after {elapsed}s ({attempts} attempts)",
+            "elapsed": elapsed,
+            "attempts": attempts,
+        })
 
 
 @json_safe
@@ -1593,139 +2302,205 @@ def cmd_disconnect(args):
     control_path = state.get("control_path", "")
     host = state.get("host", "")
 
-    try:
-        if os.path.exists(control_path):
+    # The stat only guards the ssh spawn; the unlinks just try and swallow
+    # the miss, which is cheaper than probing first.  The control socket
+    # lives in the shared cache dir, so remove the files, not the dir.
+    if control_path and os.path.exists(control_path):
+        with contextlib.suppress(Exception):
             subprocess.run(
                 ['ssh', '-o', f'ControlPath={control_path}', '-O', 'exit', host],
                 capture_output=True, timeout=5,
             )
-    except Exception:
-        pass
-
-    try:
-        if os.path.exists(control_path):
-            os.unlink(control_path)
-    except Exception:
-        pass
 
-    if os.path.exists(STATE_FILE):
-        os.unlink(STATE_FILE)
+    for path in (control_path, STATE_FILE):
+        with contextlib.suppress(OSError):
+            os.unlink(path)
 
     _output({"success": True})
 
 
-def main():
+def _build_parser(only=None):
+    """Build the CLI parser.
+
+    With only set, just that subcommand's parser is registered: each CLI
+    call runs a single subcommand, so building all the others is wasted
+    startup.  Returns (parser, matched); matched is False when only named
+    no known subcommand, in which case the caller rebuilds them all so
+    argparse can report the full set of choices.
+    """
     parser = argparse.ArgumentParser(description="SSH tool for eqa")
     subparsers = parser.add_subparsers(dest="subcommand", required=True)
+    matched = False
 
     # connect
-    p_connect = subparsers.add_parser("connect")
-    p_connect.add_argument("--host", default=None, help="Workstation hostname (auto-detected from ~/.ssh/config if omitted)")
-    p_connect.set_defaults(func=cmd_connect)
+    if only in (None, "connect"):
+        matched = True
+        p_connect = subparsers.add_parser("connect")
+        p_connect.add_argument("--host", default=None, help="Workstation hostname (auto-detected from ~/.ssh/config if omitted)")
+        p_connect.add_argument("--refresh", action="store_true", help="Re-detect the lab framework even if a recent result is cached")
+        p_connect.set_defaults(func=cmd_connect)
 
     # status
-    p_status = subparsers.add_parser("status")
-    p_status.set_defaults(func=cmd_status)
+    if only in (None, "status"):
+        matched = True
+        p_status = subparsers.add_parser("status")
+        p_status.set_defaults(func=cmd_status)
 
     # tunnel
-    p_tunnel = subparsers.add_parser("tunnel")
-    p_tunnel.set_defaults(func=cmd_tunnel)
+    if only in (None, "tunnel"):
+        matched = True
+        p_tunnel = subparsers.add_parser("tunnel")
+        p_tunnel.set_defaults(func=cmd_tunnel)
 
     # run
-    p_run = subparsers.add_parser("run")
-    p_run.add_argument("command")
-    p_run.add_argument("--timeout", type=int, default=120)
-    p_run.set_defaults(func=cmd_run)
+    if only in (None, "run"):
+        matched = True
+        p_run = subparsers.add_parser("run")
+        p_run.add_argument("command")
+        p_run.add_argument("--timeout", type=int, default=120)
+        p_run.set_defaults(func=cmd_run)
 
     # lab
-    p_lab = subparsers.add_parser("lab")
-    p_lab.add_argument("action", choices=["start", "finish", "grade", "install", "solve", "force"])
-    p_lab.add_argument("exercise")
-    p_lab.add_argument("--timeout", type=int, default=600)
-    p_lab.set_defaults(func=cmd_lab)
+    if only in (None, "lab"):
+        matched = True
+        p_lab = subparsers.add_parser("lab")
+        p_lab.add_argument("action", choices=["start", "finish", "grade", "install", "solve", "force"])
+        p_lab.add_argument("exercise")
+        p_lab.add_argument("--timeout", type=int, default=600)
+        p_lab.set_defaults(func=cmd_lab)
 
     # vm-exec
-    p_vm_exec = subparsers.add_parser("vm-exec")
-    p_vm_exec.add_argument("vm_name")
-    p_vm_exec.add_argument("--namespace", "-n", required=True)
-    p_vm_exec.add_argument("--command", "-c", required=True)
-    p_vm_exec.add_argument("--user", default="root")
-    p_vm_exec.add_argument("--password", default="redhat")
-    p_vm_exec.add_argument("--timeout", type=int, default=60)
-    p_vm_exec.set_defaults(func=cmd_vm_exec)
+    if only in (None, "vm-exec"):
+        matched = True
+        p_vm_exec = subparsers.add_parser("vm-exec")
+        p_vm_exec.add_argument("vm_name")
+        p_vm_exec.add_argument("--namespace", "-n", required=True)
+        p_vm_exec.add_argument("--command", "-c", required=True, action="append",
+                               help="Command to run; repeat to run several in one session")
+        p_vm_exec.add_argument("--user", default="root")
+        p_vm_exec.add_argument("--password", default="redhat")
+        p_vm_exec.add_argument("--timeout", type=int, default=60)
+        p_vm_exec.set_defaults(func=cmd_vm_exec)
 
     # vm-disks
-    p_vm_disks = subparsers.add_parser("vm-disks")
-    p_vm_disks.add_argument("vm_name")
-    p_vm_disks.add_argument("--namespace", "-n", required=True)
-    p_vm_disks.add_argument("--timeout", type=int, default=30)
-    p_vm_disks.set_defaults(func=cmd_vm_disks)
+    if only in (None, "vm-disks"):
+        matched = True
+        p_vm_disks = subparsers.add_parser("vm-disks")
+        p_vm_disks.add_argument("vm_name")
+        p_vm_disks.add_argument("--namespace", "-n", required=True)
+        p_vm_disks.add_argument("--timeout", type=int, default=30)
+        p_vm_disks.set_defaults(func=cmd_vm_disks)
 
     # interactive
-    p_interactive = subparsers.add_parser("interactive")
-    p_interactive.add_argument("command")
-    p_interactive.add_argument("--prompts", required=True, help="JSON array of [pattern, response] pairs")
-    p_interactive.add_argument("--timeout", type=int, default=120)
-    p_interactive.set_defaults(func=cmd_interactive)
+    if only in (None, "interactive"):
+        matched = True
+        p_interactive = subparsers.add_parser("interactive")
+        p_interactive.add_argument("command")
+        p_interactive.add_argument("--prompts", required=True, help="JSON array of [pattern, response] pairs")
+        p_interactive.add_argument("--timeout", type=int, default=120)
+        p_interactive.set_defaults(func=cmd_interactive)
 
     # write-file
-    p_write = subparsers.add_parser("write-file")
-    p_write.add_argument("remote_path")
-    p_write.add_argument("--content", required=True, help="Base64-encoded content")
-    p_write.set_defaults(func=cmd_write_file)
+    if only in (None, "write-file"):
+        matched = True
+        p_write = subparsers.add_parser("write-file")
+        p_write.add_argument("remote_path")
+        write_src = p_write.add_mutually_exclusive_group(required=True)
+        write_src.add_argument("--content", help="Base64-encoded content")
+        write_src.add_argument("--content-file", metavar="PATH",
+                               help="Local file to upload as-is ('-' for stdin)")
+        p_write.set_defaults(func=cmd_write_file)
 
     # read-file
-    p_read = subparsers.add_parser("read-file")
-    p_read.add_argument("remote_path")
-    p_read.set_defaults(func=cmd_read_file)
+    if only in (None, "read-file"):
+        matched = True
+        p_read = subparsers.add_parser("read-file")
+        p_read.add_argument("remote_path")
+        p_read.set_defaults(func=cmd_read_file)
 
     # devcontainer-start
-    p_dc_start = subparsers.add_parser("devcontainer-start")
-    p_dc_start.add_argument("project_dir")
-    p_dc_start.set_defaults(func=cmd_devcontainer_start)
+    if only in (None, "devcontainer-start"):
+        matched = True
+        p_dc_start = subparsers.add_parser("devcontainer-start")
+        p_dc_start.add_argument("project_dir")
+        p_dc_start.set_defaults(func=cmd_devcontainer_start)
 
     # devcontainer-run
-    p_dc_run = subparsers.add_parser("devcontainer-run")
-    p_dc_run.add_argument("command")
-    p_dc_run.add_argument("--workdir", default=None)
-    p_dc_run.add_argument("--user", default=None)
-    p_dc_run.add_argument("--timeout", type=int, default=120)
-    p_dc_run.set_defaults(func=cmd_devcontainer_run)
+    if only in (None, "devcontainer-run"):
+        matched = True
+        p_dc_run = subparsers.add_parser("devcontainer-run")
+        p_dc_run.add_argument("command")
+        p_dc_run.add_argument("--workdir", default=None)
+        p_dc_run.add_argument("--user", default=None)
+        p_dc_run.add_argument("--timeout", type=int, default=120)
+        p_dc_run.set_defaults(func=cmd_devcontainer_run)
+
+    # devcontainer-run-batch
+    if only in (None, "devcontainer-run-batch"):
+        matched = True
+        p_dc_batch = subparsers.add_parser("devcontainer-run-batch")
+        p_dc_batch.add_argument("--commands", required=True, metavar="PATH",
+                                help="JSON-lines file of commands ('-' for stdin)")
+        p_dc_batch.add_argument("--concurrency", type=int, default=4,
+                                help=f"Parallel execs (at most {_BATCH_MAX_CONCURRENCY})")
+        p_dc_batch.add_argument("--timeout", type=int, default=120, help="Per-command timeout")
+        p_dc_batch.set_defaults(func=cmd_devcontainer_run_batch)
 
     # devcontainer-stop
-    p_dc_stop = subparsers.add_parser("devcontainer-stop")
-    p_dc_stop.set_defaults(func=cmd_devcontainer_stop)
+    if only in (None, "devcontainer-stop"):
+        matched = True
+        p_dc_stop = subparsers.add_parser("devcontainer-stop")
+        p_dc_stop.set_defaults(func=cmd_devcontainer_stop)
 
     # autotest
-    p_autotest = subparsers.add_parser("autotest")
-    p_autotest.add_argument("--ignore-errors", action="store_true")
-    p_autotest.add_argument("--timeout", type=int, default=1800)
-    p_autotest.set_defaults(func=cmd_autotest)
+    if only in (None, "autotest"):
+        matched = True
+        p_autotest = subparsers.add_parser("autotest")
+        p_autotest.add_argument("--ignore-errors", action="store_true")
+        p_autotest.add_argument("--timeout", type=int, default=1800)
+        p_autotest.set_defaults(func=cmd_autotest)
 
     # coursetest
-    p_coursetest = subparsers.add_parser("coursetest")
-    p_coursetest.add_argument("scripts_file", nargs="?", default="scripts.yml")
-    p_coursetest.add_argument("--dry-run", action="store_true")
-    p_coursetest.add_argument("--timeout", type=int, default=3600)
-    p_coursetest.set_defaults(func=cmd_coursetest)
+    if only in (None, "coursetest"):
+        matched = True
+        p_coursetest = subparsers.add_parser("coursetest")
+        p_coursetest.add_argument("scripts_file", nargs="?", default="scripts.yml")
+        p_coursetest.add_argument("--dry-run", action="store_true")
+        p_coursetest.add_argument("--timeout", type=int, default=3600)
+        p_coursetest.set_defaults(func=cmd_coursetest)
 
     # wait-for
-    p_wait = subparsers.add_parser("wait-for")
-    p_wait.add_argument("--mode", required=True, choices=["tcp", "http", "command", "file"])
-    p_wait.add_argument("--target", required=True, help="host:port, URL, shell command, or file path")
-    p_wait.add_argument("--timeout", type=int, default=120)
-    p_wait.add_argument("--interval", type=int, default=5)
-    p_wait.set_defaults(func=cmd_wait_for)
+    if only in (None, "wait-for"):
+        matched = True
+        p_wait = subparsers.add_parser("wait-for")
+        p_wait.add_argument("--mode", required=True, choices=["tcp", "http", "command", "file"])
+        p_wait.add_argument("--target", required=True, help="host:port, URL, shell command, or file path")
+        p_wait.add_argument("--timeout", type=int, default=120)
+        p_wait.add_argument("--interval", type=int, default=5)
+        p_wait.set_defaults(func=cmd_wait_for)
 
     # diff
-    p_diff = subparsers.add_parser("diff")
-    p_diff.add_argument("remote_path")
-    p_diff.add_argument("--expected", required=True, help="Base64-encoded expected content")
-    p_diff.set_defaults(func=cmd_diff)
+    if only in (None, "diff"):
+        matched = True
+        p_diff = subparsers.add_parser("diff")
+        p_diff.add_argument("remote_path")
+        p_diff.add_argument("--expected", required=True, help="Base64-encoded expected content")
+        p_diff.set_defaults(func=cmd_diff)
 
     # disconnect
-    p_disconnect = subparsers.add_parser("disconnect")
-    p_disconnect.set_defaults(func=cmd_disconnect)
+    if only in (None, "disconnect"):
+        matched = True
+        p_disconnect = subparsers.add_parser("disconnect")
+        p_disconnect.set_defaults(func=cmd_disconnect)
+
+    return parser, matched
+
+
+def main():
+    only = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].startswith('-') else None
+    parser, matched = _build_parser(only)
+    if not matched:
+        parser, _ = _build_parser()
 
     args = parser.parse_args()
     args.func(args)
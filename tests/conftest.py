@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The tools are standalone scripts importing each other by module name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, ".skilldata", "scripts"))
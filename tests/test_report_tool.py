@@ -0,0 +1,18 @@
+import datetime
+
+import report_tool
+
+
+def test_serve_dates_each_report(monkeypatch):
+    days = iter([datetime.date(2026, 1, 1), datetime.date(2026, 1, 2)])
+
+    class FakeDate(datetime.date):
+        @classmethod
+        def today(cls):
+            return next(days)
+
+    monkeypatch.setattr(report_tool.datetime, "date", FakeDate)
+    request = {"cmd": "exercise", "data": {"exercise_id": "ch01s02"}}
+    first = report_tool._serve_request(request)["report"]
+    second = report_tool._serve_request(request)["report"]
+    assert "2026-01-01" in first and "2026-01-02" in second
@@ -0,0 +1,216 @@
+import argparse
+import gc
+import os
+import subprocess
+import time
+import warnings
+
+import ssh_tool
+
+
+def test_strip_ansi_st_terminated_osc_keeps_following_output():
+    text = ("line1 \x1b]8;;http://x\x1b\\link\x1b]8;;\x1b\\ done\n"
+            "result: 42 important\nmore output\n\x07bell")
+    assert ssh_tool._strip_ansi(text, strip_spinners=False) == (
+        "line1 link done\nresult: 42 important\nmore output\nbell")
+
+
+def test_strip_ansi_bel_terminated_osc():
+    assert ssh_tool._strip_ansi("\x1b]0;title\x07ok", strip_spinners=False) == "ok"
+
+
+def test_strip_ansi_many_osc8_links_is_linear():
+    text = "\x1b]8;;http://x\x1b\\link\x1b]8;;\x1b\\ " * 20000 + "\x07"
+    start = time.perf_counter()
+    out = ssh_tool._strip_ansi(text, strip_spinners=False)
+    assert time.perf_counter() - start < 1
+    assert out == "link " * 20000
+
+
+def test_concurrent_refused_sessions_restart_master_once(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    state = {"host": "workstation", "control_path": "/tmp/eqa-test.sock"}
+    master = {"alive": False, "starts": 0}
+    attempts = {}
+
+    def fake_once(state, cmd, timeout, input_data, strip=True):
+        attempts[cmd] = attempts.get(cmd, 0) + 1
+        if attempts[cmd] == 1:
+            time.sleep(0.05)
+            return (False, "", "mux_client_request_session: session request failed", 255, 0.0)
+        return (True, cmd, "", 0, 0.0)
+
+    def fake_start(host, control_path):
+        time.sleep(0.05)
+        master["starts"] += 1
+        master["alive"] = True
+        return None
+
+    monkeypatch.setattr(ssh_tool, "_ssh_exec_once", fake_once)
+    monkeypatch.setattr(ssh_tool, "_check_connection", lambda state: master["alive"])
+    monkeypatch.setattr(ssh_tool, "_start_master", fake_start)
+    monkeypatch.setattr(ssh_tool.os.path, "exists", lambda path: False)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: ssh_tool._ssh_exec(state, f"cmd{i}"), range(8)))
+
+    assert master["starts"] == 1
+    assert all(r[0] for r in results)
+
+
+def test_bounded_exec_keeps_a_command_exit_124(monkeypatch):
+    monkeypatch.setattr(ssh_tool, "_ssh_exec",
+                        lambda state, cmd, timeout: (False, "out", "harness gave up", 124, 1.5))
+    assert ssh_tool._ssh_exec_bounded({}, "run-tests", 60) == (
+        False, "out", "harness gave up", 124, 1.5)
+
+
+def test_bounded_exec_reports_wrapper_timeout_with_stderr(monkeypatch):
+    monkeypatch.setattr(ssh_tool, "_ssh_exec",
+                        lambda state, cmd, timeout: (False, "out", "partial", 124, 60.2))
+    assert ssh_tool._ssh_exec_bounded({}, "run-tests", 60) == (
+        False, "out", "partial\nCommand timed out after 60s", -1, 60.2)
+
+
+def _local_run(command, timeout=10, strip=True):
+    result = subprocess.run(["bash", "-c", command], capture_output=True, text=True,
+                            timeout=timeout, env={"PATH": "/usr/bin:/bin"})
+    return result.returncode, result.stdout, result.stderr
+
+
+def test_batch_probe_times_out_each_probe_separately():
+    probes = ssh_tool._batch_probe(
+        _local_run, {"slow": "sleep 5", "fast": "echo hi"}, probe_timeout=1)
+    assert probes == {"slow": (124, ""), "fast": (0, "hi")}
+
+
+def test_lab_probes_are_skipped_without_lab():
+    probes = ssh_tool._batch_probe(_local_run, ssh_tool._FRAMEWORK_PROBES)
+    for name in ("lab_v", "lab_version", "lab_help"):
+        assert probes[name] == (1, "")
+
+
+def test_incomplete_detection_is_not_cached(monkeypatch):
+    saved = []
+    monkeypatch.setattr(ssh_tool, "load_state", lambda path: {})
+    monkeypatch.setattr(ssh_tool, "save_state", lambda path, data: saved.append(data))
+    fw = {"framework": "dynolabs5", "prefix": "lab", "validated": True,
+          "issues": [], "fixes_applied": []}
+    ssh_tool._cache_framework("workstation", {**fw, "probes_complete": False})
+    assert saved == []
+    ssh_tool._cache_framework("workstation", {**fw, "probes_complete": True})
+    assert "probes_complete" not in saved[0]["workstation"]["result"]
+
+
+def test_mark_devcontainer_alive_leaves_state_cache_untouched(tmp_path, monkeypatch):
+    path = str(tmp_path / "ssh-state.json")
+    ssh_tool.save_state(path, {"devcontainer": {"name": "dc", "last_ok_ts": 1.0}})
+    monkeypatch.setattr(ssh_tool, "save_state", lambda path, data: None)
+    state = ssh_tool.load_state(path)
+    ssh_tool._mark_devcontainer_alive(state, [{"return_code": 0}])
+    assert state["devcontainer"]["last_ok_ts"] > 1.0
+    assert ssh_tool.load_state(path)["devcontainer"]["last_ok_ts"] == 1.0
+
+
+def _connected(tmp_path, monkeypatch):
+    """Point STATE_FILE at a connected state whose control socket exists."""
+    sock = tmp_path / "cm.sock"
+    sock.touch()
+    state = {"host": "workstation", "control_path": str(sock)}
+    monkeypatch.setattr(ssh_tool, "load_state", lambda path: dict(state))
+    calls = []
+    monkeypatch.setattr(ssh_tool.subprocess, "run",
+                        lambda cmd, **kw: calls.append(cmd) or
+                        subprocess.CompletedProcess(cmd, 0, b"", b""))
+    return calls
+
+
+def test_requires_connection_only_stats_the_socket(tmp_path, monkeypatch):
+    calls = _connected(tmp_path, monkeypatch)
+    seen = []
+    ssh_tool.requires_connection(lambda args, state: seen.append(state))(None)
+    assert seen and calls == []
+
+
+def test_run_spawns_only_the_command_itself(tmp_path, monkeypatch, capfd):
+    calls = _connected(tmp_path, monkeypatch)
+    ssh_tool.cmd_run(argparse.Namespace(command="true", timeout=10))
+    assert len(calls) == 1 and calls[0][-1] == "true"
+    assert '"success":true' in capfd.readouterr().out.replace(" ", "")
+
+
+def test_tunnel_with_cached_subnets_makes_no_remote_call(tmp_path, monkeypatch, capfd):
+    calls = _connected(tmp_path, monkeypatch)
+    monkeypatch.setattr(ssh_tool, "load_state", lambda path: {
+        "host": "workstation", "control_path": str(tmp_path / "cm.sock"),
+        "subnets": ["172.25.250.0/24"]})
+    ssh_tool.cmd_tunnel(argparse.Namespace())
+    assert calls == []
+    assert "172.25.250.0/24" in capfd.readouterr().out
+
+
+def test_batch_probe_keeps_sections_finished_before_a_session_timeout():
+    def timed_out_run(command, timeout=10, strip=True):
+        try:
+            subprocess.run(["bash", "-c", command], capture_output=True, text=True, timeout=1)
+        except subprocess.TimeoutExpired as e:
+            return -1, ssh_tool._partial_stdout(e), ""
+
+    probes = ssh_tool._batch_probe(
+        timed_out_run, {"which_lab": "echo /usr/bin/lab", "lab_v": "sleep 5", "uv": "true"})
+    assert probes == {"which_lab": (0, "/usr/bin/lab"), "lab_v": (-1, ""), "uv": (-1, "")}
+
+
+def test_batch_probe_session_timeout_covers_every_probe():
+    seen = []
+
+    def ssh_run(command, timeout=10, strip=True):
+        seen.append(timeout)
+        return 0, "", ""
+
+    ssh_tool._batch_probe(ssh_run, ssh_tool._FRAMEWORK_PROBES)
+    assert seen[0] > len(ssh_tool._FRAMEWORK_PROBES) * 10
+
+
+def _fake_ssh(tmp_path, monkeypatch, body='shift; exec bash -c "$1"'):
+    """Put an ssh on PATH that runs the remote command locally."""
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    (bindir / "ssh").write_text(f"#!/bin/bash\n{body}\n")
+    (bindir / "ssh").chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bindir}:{os.environ['PATH']}")
+    monkeypatch.setattr(ssh_tool, "_ssh_opts", lambda state: [])
+
+
+def test_exec_tail_timeout_keeps_the_tail_and_closes_pipes(tmp_path, monkeypatch):
+    _fake_ssh(tmp_path, monkeypatch)
+    state = {"host": "workstation"}
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", ResourceWarning)
+        ok, out, err, rc, _ = ssh_tool._ssh_exec_tail(
+            state, "echo step 1; echo oops >&2; exec sleep 5", 1, 1024)
+        gc.collect()
+    assert (ok, out, rc) == (False, "step 1", -1)
+    assert err == "oops\nCommand timed out after 1s"
+
+
+def test_exec_tail_retries_a_refused_session(tmp_path, monkeypatch):
+    marker = tmp_path / "refused"
+    _fake_ssh(tmp_path, monkeypatch, body=(
+        f'if [ ! -e {marker} ]; then touch {marker}; '
+        'echo "mux_client_request_session: session request failed" >&2; exit 255; fi\n'
+        'shift; exec bash -c "$1"'))
+    monkeypatch.setattr(ssh_tool, "_reconnect", lambda state: None)
+    result = ssh_tool._ssh_exec_tail({"host": "workstation"}, "echo done", 10, 1024)
+    assert result[:4] == (True, "done", "", 0)
+
+
+def test_container_argv_wraps_every_bash_builtin_and_keyword():
+    names = subprocess.run(["bash", "-c", "compgen -b -k"],
+                           capture_output=True, text=True).stdout.split()
+    for name in ("mapfile", "readarray", "compgen", "caller", "coproc", "suspend"):
+        assert name in names
+    for name in names:
+        assert ssh_tool._container_argv(f"{name} x").startswith("bash -c "), name
+    assert ssh_tool._container_argv("ansible-lint site.yml") == "ansible-lint site.yml"